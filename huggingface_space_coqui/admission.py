@@ -0,0 +1,162 @@
+"""
+Admission control for synthesis requests.
+
+At most `max_concurrency` requests synthesize at once; the rest wait in a
+bounded queue. A request is rejected right away, with a retry-after hint,
+when the queue is full or its predicted wait is longer than `max_wait_s`,
+and it is dropped if it still hasn't started after `max_wait_s`. Clients
+such as IReader can then fall back (e.g. to on-device TTS) instead of
+waiting on a server that can't keep up.
+
+Waiting requests are served cheapest first by estimated cost (characters),
+so one long chapter can't hold up many short passages; the cost of a
+request shrinks the longer it waits, so long requests are not starved.
+"""
+
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when a request is not admitted; retry_after is a hint in whole seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Ticket:
+    cost: int
+    sequence: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AdmissionController:
+    """
+    Bounded, cost-ordered admission queue in front of synthesis
+
+    Args:
+        max_concurrency: Requests synthesizing at once
+        max_depth: Max requests waiting; further requests are rejected
+        max_wait_s: Longest a request may wait (predicted or actual) before it is rejected
+        aging_chars_per_second: How much a waiting request's effective cost drops per second waited
+    """
+
+    def __init__(self, max_concurrency: int, max_depth: int = 32, max_wait_s: float = 30.0,
+                 aging_chars_per_second: float = 100.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_depth = max_depth
+        self.max_wait_s = max_wait_s
+        self.aging_chars_per_second = aging_chars_per_second
+
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._waiting: List[_Ticket] = []
+        self._running: Dict[int, _Ticket] = {}
+        # Characters per second of a single request, smoothed over completed requests
+        self._request_rate = None
+
+        self.admitted = 0
+        self.rejected = {'queue_full': 0, 'predicted_wait': 0, 'timeout': 0}
+
+    @contextmanager
+    def admit(self, cost: int):
+        """Hold a synthesis slot for the with-block; raises Overloaded if the request is not admitted."""
+        ticket = self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def qsize(self) -> int:
+        with self._condition:
+            return len(self._waiting)
+
+    def stats(self) -> Dict[str, object]:
+        with self._condition:
+            return {
+                'running': len(self._running),
+                'waiting': len(self._waiting),
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'request_chars_per_second': self._request_rate,
+            }
+
+    def _effective_cost(self, ticket: _Ticket, now: float) -> float:
+        return ticket.cost - self.aging_chars_per_second * (now - ticket.enqueued_at)
+
+    def _next_ticket(self, now: float) -> _Ticket:
+        return min(self._waiting, key=lambda ticket: (self._effective_cost(ticket, now), ticket.sequence))
+
+    def _predicted_wait(self, cost: int, now: float) -> float:
+        """Seconds until a new request of this cost would start (0 while there's no throughput estimate yet)."""
+        if not self._request_rate:
+            return 0.0
+        # Until the first running request finishes...
+        first_free = 0.0
+        if len(self._running) >= self.max_concurrency:
+            first_free = min(max(0.0, ticket.cost / self._request_rate - (now - ticket.enqueued_at))
+                             for ticket in self._running.values())
+        # ...plus the cheaper waiting work, spread over all slots
+        ahead = sum(ticket.cost for ticket in self._waiting if self._effective_cost(ticket, now) <= cost)
+        return first_free + ahead / (self._request_rate * self.max_concurrency)
+
+    def _reject(self, reason: str, message: str, wait: float):
+        self.rejected[reason] += 1
+        retry_after = max(1, math.ceil(wait))
+        logger.warning(f"Rejected request ({reason}): {message}, retry after {retry_after}s")
+        raise Overloaded(f"Server busy: {message}", retry_after)
+
+    def acquire(self, cost: int) -> _Ticket:
+        """Wait for a synthesis slot; raises Overloaded if the request is not admitted. Pair with release()."""
+        cost = max(1, cost)
+        with self._condition:
+            now = time.monotonic()
+            ticket = _Ticket(cost=cost, sequence=next(self._sequence))
+            if len(self._running) < self.max_concurrency and not self._waiting:
+                return self._start(ticket)
+            if len(self._waiting) >= self.max_depth:
+                self._reject('queue_full', f"{len(self._waiting)} requests queued", self._predicted_wait(cost, now))
+            predicted = self._predicted_wait(cost, now)
+            if predicted > self.max_wait_s:
+                self._reject('predicted_wait', f"expected wait {predicted:.0f}s", predicted)
+
+            self._waiting.append(ticket)
+            deadline = now + self.max_wait_s
+            while True:
+                now = time.monotonic()
+                if len(self._running) < self.max_concurrency and self._next_ticket(now) is ticket:
+                    self._waiting.remove(ticket)
+                    return self._start(ticket)
+                if now >= deadline:
+                    self._waiting.remove(ticket)
+                    # Our place in line may have been the one others were waiting for
+                    self._condition.notify_all()
+                    self._reject('timeout', f"not started within {self.max_wait_s:.0f}s",
+                                 self._predicted_wait(cost, now))
+                self._condition.wait(deadline - now)
+
+    def _start(self, ticket: _Ticket) -> _Ticket:
+        # From here on enqueued_at marks the start of synthesis
+        ticket.enqueued_at = time.monotonic()
+        self._running[ticket.sequence] = ticket
+        self.admitted += 1
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        """Free the slot taken by acquire()."""
+        with self._condition:
+            del self._running[ticket.sequence]
+            duration = max(time.monotonic() - ticket.enqueued_at, 1e-3)
+            rate = ticket.cost / duration
+            self._request_rate = rate if self._request_rate is None else 0.8 * self._request_rate + 0.2 * rate
+            self._condition.notify_all()
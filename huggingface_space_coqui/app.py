@@ -1,67 +1,531 @@
 import gradio as gr
-from TTS.api import TTS
 import numpy as np
+import itertools
 import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from admission import AdmissionController, Overloaded
+from audio_cache import AudioCache, make_cache_key
+from audio_utils import MEDIA_TYPES, encode_audio, time_stretch, wav_header
+from batching import MicroBatcher
+from jobs import DONE, JobQueue, JobQueueFull
+from metrics import MetricsRegistry
+from model_registry import ModelRegistry
+from phoneme_cache import PHONEME_CACHE, combine_stats
+from synthesis import SENTENCE_PAUSE_SAMPLES, estimate_model_bytes, load_model, synthesize_requests
+from text_processing import normalize_sentence, normalize_text, split_sentences
+from warmup import WARMUP_TEXTS, StartupState
+from worker_pool import SynthesisWorkerPool
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Using fast_pitch for better performance
+# Alternative: "tts_models/en/ljspeech/tacotron2-DDC" for higher quality
+MODEL_NAME = "tts_models/en/ljspeech/fast_pitch"
+
+# Further models that can be picked per request (comma-separated), loaded on first use
+EXTRA_MODELS = [name.strip() for name in os.environ.get("TTS_MODELS", "tts_models/en/ljspeech/tacotron2-DDC").split(",")
+                if name.strip() and name.strip() != MODEL_NAME]
+AVAILABLE_MODELS = [MODEL_NAME] + EXTRA_MODELS
+# Loaded models are evicted least-recently-used first above this budget (per process; MODEL_NAME stays loaded)
+MODEL_MEMORY_MB = int(os.environ.get("TTS_MODEL_MEMORY_MB", "1024"))
+
+# Synthesized audio cache (memory LRU + disk), sized via environment variables
+CACHE_MEMORY_MB = int(os.environ.get("TTS_CACHE_MEMORY_MB", "64"))
+CACHE_DISK_MB = int(os.environ.get("TTS_CACHE_DISK_MB", "512"))
+CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "/tmp/coqui_tts_cache")
+
+# Concurrent requests arriving within the window are synthesized in one batched forward pass
+BATCH_MAX_SIZE = int(os.environ.get("TTS_BATCH_MAX_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.environ.get("TTS_BATCH_WINDOW_MS", "25"))
+
+# Per-sentence audio cache, so lines repeated across chapters are synthesized once
+SENTENCE_CACHE_MEMORY_MB = int(os.environ.get("TTS_SENTENCE_CACHE_MEMORY_MB", "64"))
+SENTENCE_CACHE_DISK_MB = int(os.environ.get("TTS_SENTENCE_CACHE_DISK_MB", "512"))
+
+# Long-form chapter synthesis: all sentences are synthesized in parallel and joined
+CHAPTER_MAX_CHARS = int(os.environ.get("TTS_CHAPTER_MAX_CHARS", "100000"))
+
+# Background prefetch jobs (e.g. the reader's next chapter)
+JOB_MAX_QUEUED = int(os.environ.get("TTS_JOB_MAX_QUEUED", "32"))
+JOB_THREADS = int(os.environ.get("TTS_JOB_THREADS", "1"))
+# Finished jobs keep raw int16 audio until fetched (~3 MB per minute at 22 kHz)
+JOB_MAX_FINISHED_MB = int(os.environ.get("TTS_JOB_MAX_FINISHED_MB", "512"))
+
+# Worker processes, each with its own model copy (0 = synthesize in the server process)
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "0"))
+# Intra-op torch threads per worker/server process (0 = torch default / cores split across workers)
+TORCH_THREADS = int(os.environ.get("TTS_TORCH_THREADS", "0"))
+
+# "stretch": synthesize and cache at 1.0x only, derive other speeds by time-stretching the audio
+# "model": pass the speed to the model (only honored by models that support it)
+SPEED_MODE = os.environ.get("TTS_SPEED_MODE", "stretch")
+
+# Admission control: requests beyond the concurrency limit wait (cheapest first) in a bounded
+# queue and are rejected with a retry-after hint when it is full or the wait would be too long
+ADMISSION_CONCURRENCY = int(os.environ.get("TTS_ADMISSION_CONCURRENCY", str(BATCH_MAX_SIZE * max(1, TTS_WORKERS))))
+ADMISSION_MAX_QUEUE = int(os.environ.get("TTS_ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_MAX_WAIT_S = float(os.environ.get("TTS_ADMISSION_MAX_WAIT_S", "30"))
+
+# Warm-up after the model load: "background" (serve right away, /ready turns 200 once warm),
+# "blocking" (warm up before the server starts listening) or "off"
+WARMUP_MODE = os.environ.get("TTS_WARMUP", "background")
+
 # Initialize Coqui TTS with high-quality model
 logger.info("Loading Coqui TTS model...")
+startup = StartupState()
+load_start_time = time.perf_counter()
 try:
-    # Using fast_pitch for better performance
-    # Alternative: "tts_models/en/ljspeech/tacotron2-DDC" for higher quality
-    tts = TTS("tts_models/en/ljspeech/fast_pitch")
-    logger.info("✅ Coqui TTS model loaded successfully!")
+    if TTS_WORKERS > 0:
+        # Workers are forked before this process uses torch and load the model themselves
+        worker_pool = SynthesisWorkerPool(MODEL_NAME, TTS_WORKERS, TORCH_THREADS, MODEL_MEMORY_MB * 1024 * 1024)
+        worker_pool.wait_ready()
+        models = None
+    else:
+        worker_pool = None
+        if TORCH_THREADS > 0:
+            import torch
+            torch.set_num_threads(TORCH_THREADS)
+        models = ModelRegistry(load_model, estimate_model_bytes, MODEL_MEMORY_MB * 1024 * 1024, pinned=[MODEL_NAME])
+        models.get(MODEL_NAME)
+    startup.model_load_seconds = time.perf_counter() - load_start_time
+    logger.info(f"✅ Coqui TTS model loaded successfully in {startup.model_load_seconds:.1f}s")
 except Exception as e:
     logger.error(f"❌ Failed to load TTS model: {e}")
     raise
 
-def text_to_speech(text, speed=1.0):
+# Output sample rate from the model/vocoder config (22050 Hz for LJSpeech models)
+SAMPLE_RATE = worker_pool.sample_rate if worker_pool is not None else models.get(MODEL_NAME).synthesizer.output_sample_rate
+sample_rates = {MODEL_NAME: SAMPLE_RATE}
+
+def _sample_rate(model_name):
+    """Output sample rate of a model, loading it on first use"""
+    if model_name not in sample_rates:
+        if worker_pool is not None:
+            # An empty batch makes a worker load the model and report its sample rate
+            worker_pool.submit([], model_name).result()
+            sample_rates[model_name] = worker_pool.sample_rates[model_name]
+        else:
+            sample_rates[model_name] = models.get(model_name).synthesizer.output_sample_rate
+    return sample_rates[model_name]
+
+def _resolve_model(model_name):
+    """Default model for None/empty, otherwise the name if it is one of AVAILABLE_MODELS"""
+    if not model_name:
+        return MODEL_NAME
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError(f"Unknown model '{model_name}', available: {', '.join(AVAILABLE_MODELS)}")
+    return model_name
+
+def _warm_up():
+    """
+    Synthesize WARMUP_TEXTS with the default model, bypassing caches and metrics
+    
+    Every worker gets the same batch (least-loaded dispatch spreads simultaneous
+    batches one per worker), then a single short request follows, the common
+    interactive shape. Time-stretching and Opus encoding are warmed too.
+    """
+    requests = [(text, 1.0) for text in WARMUP_TEXTS]
+    if worker_pool is not None:
+        futures = [worker_pool.submit(requests) for _ in range(worker_pool.num_workers)]
+        wavs = [future.result() for future in futures][0]
+        worker_pool.submit(requests[:1]).result()
+    else:
+        tts = models.get(MODEL_NAME)
+        wavs = synthesize_requests(tts, requests)
+        synthesize_requests(tts, requests[:1])
+    encode_audio(time_stretch(wavs[-1], 1.5), SAMPLE_RATE, "ogg")
+
+if WARMUP_MODE == "off":
+    startup.skip_warmup()
+else:
+    startup.warm_up(_warm_up, background=WARMUP_MODE != "blocking")
+
+audio_cache = AudioCache(
+    memory_budget_bytes=CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=CACHE_DIR,
+    disk_budget_bytes=CACHE_DISK_MB * 1024 * 1024
+)
+
+sentence_cache = AudioCache(
+    memory_budget_bytes=SENTENCE_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=os.path.join(CACHE_DIR, "sentences"),
+    disk_budget_bytes=SENTENCE_CACHE_DISK_MB * 1024 * 1024
+)
+
+# Rendered for sentences with nothing to pronounce (scene breaks, "..." lines)
+SILENT_PAUSE = np.zeros(SENTENCE_PAUSE_SAMPLES, dtype=np.int16)
+SILENT_PAUSE.flags.writeable = False
+
+# Prometheus metrics, served at /metrics
+metrics = MetricsRegistry()
+REQUEST_LATENCY = metrics.histogram(
+    "tts_request_duration_seconds", "End-to-end request latency by endpoint")
+FIRST_AUDIO_LATENCY = metrics.histogram(
+    "tts_stream_first_audio_seconds", "Time until the first streamed chunk is ready")
+SYNTHESIS_SECONDS = metrics.counter(
+    "tts_synthesis_seconds_total", "Wall time spent in synthesis passes")
+AUDIO_SECONDS = metrics.counter(
+    "tts_audio_seconds_total", "Seconds of audio synthesized (cache hits excluded)")
+CHARACTERS = metrics.counter(
+    "tts_characters_total", "Characters synthesized (cache hits excluded)")
+IN_FLIGHT = metrics.gauge(
+    "tts_inflight_sentences", "Sentences currently being synthesized")
+IN_FLIGHT.set(0)
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else 0.0
+
+metrics.gauge(
+    "tts_real_time_factor", "Audio seconds produced per wall second of synthesis",
+    lambda: {(): _ratio(AUDIO_SECONDS.value(), SYNTHESIS_SECONDS.value())})
+metrics.gauge(
+    "tts_characters_per_second", "Characters synthesized per wall second of synthesis",
+    lambda: {(): _ratio(CHARACTERS.value(), SYNTHESIS_SECONDS.value())})
+metrics.gauge(
+    "tts_queue_depth", "Items waiting to be picked up",
+    lambda: {(("queue", "admission"),): admission.qsize(), (("queue", "batcher"),): batcher.qsize(),
+             (("queue", "jobs"),): job_queue.qsize()})
+metrics.counter(
+    "tts_rejected_requests_total", "Requests turned away by admission control",
+    lambda: {(("reason", reason),): count for reason, count in admission.stats()["rejected"].items()})
+metrics.gauge(
+    "tts_cache_hit_ratio", "Fraction of cache lookups served from memory or disk",
+    lambda: {(("cache", "passages"),): audio_cache.stats()["hit_ratio"],
+             (("cache", "sentences"),): sentence_cache.stats()["hit_ratio"],
+             **{(("cache", f"phoneme_{level}"),): level_stats["hit_ratio"]
+                for level, level_stats in phoneme_cache_stats().items()}})
+metrics.gauge(
+    "tts_ready", "1 once startup warm-up has finished and synthesis is healthy",
+    lambda: {(): 1.0 if readiness()["status"] == "ready" else 0.0})
+metrics.gauge(
+    "tts_startup_seconds", "Time spent loading the default model and warming it up",
+    lambda: {(("phase", phase),): seconds
+             for phase, seconds in (("model_load", startup.model_load_seconds), ("warmup", startup.warmup_seconds))
+             if seconds is not None})
+metrics.gauge(
+    "tts_frontend_saved_seconds", "Estimated text cleaning/phonemizer time saved by the front-end cache",
+    lambda: {(("level", level),): level_stats["saved_seconds_estimate"]
+             for level, level_stats in phoneme_cache_stats().items()})
+
+def _run_batch(items):
+    """
+    Synthesize one micro-batch of (model_name, text, speed) items
+    
+    Items are grouped per model; each group runs on the least-loaded worker
+    when the pool is enabled, otherwise in this process.
+    """
+    by_model = {}
+    for index, (model_name, _, _) in enumerate(items):
+        by_model.setdefault(model_name, []).append(index)
+    
+    results = [None] * len(items)
+    IN_FLIGHT.inc(len(items))
+    start_time = time.perf_counter()
+    try:
+        for model_name, indices in by_model.items():
+            requests = [(items[i][1], items[i][2]) for i in indices]
+            if worker_pool is not None:
+                wavs = worker_pool.submit(requests, model_name).result()
+            else:
+                wavs = synthesize_requests(models.get(model_name), requests)
+            for i, wav in zip(indices, wavs):
+                results[i] = wav
+    finally:
+        IN_FLIGHT.dec(len(items))
+    SYNTHESIS_SECONDS.inc(time.perf_counter() - start_time)
+    AUDIO_SECONDS.inc(sum(len(results[i]) / _sample_rate(model_name)
+                          for model_name, indices in by_model.items() for i in indices))
+    CHARACTERS.inc(sum(len(text) for _, text, _ in items))
+    return results
+
+admission = AdmissionController(
+    max_concurrency=ADMISSION_CONCURRENCY,
+    max_depth=ADMISSION_MAX_QUEUE,
+    max_wait_s=ADMISSION_MAX_WAIT_S
+)
+
+batcher = MicroBatcher(
+    _run_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    window_ms=BATCH_WINDOW_MS,
+    concurrency=max(1, TTS_WORKERS),
+    name="tts-batcher"
+)
+
+def _prepare_input(text, speed):
+    """Validate request text and clamp speed. Returns (None, speed) for empty text."""
+    if not text or len(text.strip()) == 0:
+        logger.warning("Empty text received")
+        return None, speed
+    
+    text = normalize_text(text)
+    
+    # Limit text length to prevent abuse
+    if len(text) > 5000:
+        logger.warning(f"Text too long ({len(text)} chars), truncating to 5000")
+        text = text[:5000]
+    
+    # Validate speed
+    speed = max(0.5, min(2.0, speed))
+    return text, speed
+
+def iter_sentence_audio(sentences, speed, model_name=MODEL_NAME, background=False, stream=False):
+    """
+    Audio for each sentence, taken from the sentence cache where possible
+    
+    Sentences are normalized first; all misses (deduplicated) are submitted at
+    once so they share batched vocoder passes and spread across workers. They
+    are queued at the cost of the whole passage, so a short passage's sentences
+    run ahead of a long chapter's; background (prefetch) sentences only run
+    while no interactive sentence is waiting. When streaming, the first
+    sentence to synthesize runs in a batch of its own so the first audio is
+    not held up by the rest of the passage.
+    
+    Yields:
+        int16 arrays in sentence order, each as soon as it is ready (each ends with the sentence pause)
+    """
+    audio = [None] * len(sentences)
+    normalized_sentences = [normalize_sentence(sentence) for sentence in sentences]
+    cost = sum(len(normalized) for normalized in normalized_sentences)
+    pending = {}
+    for index, normalized in enumerate(normalized_sentences):
+        if not normalized:
+            audio[index] = SILENT_PAUSE
+            continue
+        if normalized in pending:
+            continue
+        cache_key = make_cache_key(model_name, normalized, speed)
+        audio[index] = sentence_cache.get(cache_key)
+        if audio[index] is None:
+            solo = stream and not pending
+            pending[normalized] = (cache_key, batcher.submit((model_name, normalized, speed), cost, background, solo))
+    
+    if len(sentences) > 1:
+        logger.info(f"Sentence cache: {len(sentences) - len(pending)}/{len(sentences)} sentences reused")
+    
+    finished = {}
+    for index, normalized in enumerate(normalized_sentences):
+        if audio[index] is None:
+            if normalized not in finished:
+                cache_key, future = pending[normalized]
+                finished[normalized] = future.result()
+                sentence_cache.put(cache_key, finished[normalized])
+            audio[index] = finished[normalized]
+        yield audio[index]
+
+def synthesize_sentences(sentences, speed, model_name=MODEL_NAME, background=False):
+    """All of iter_sentence_audio() as a list"""
+    return list(iter_sentence_audio(sentences, speed, model_name, background))
+
+def _model_speed(speed):
+    """Speed the model synthesizes at: always 1.0 when other speeds are time-stretched"""
+    return 1.0 if SPEED_MODE == "stretch" else speed
+
+def _apply_speed(wav, speed):
+    """Time-stretch audio synthesized at _model_speed(speed) to speed"""
+    model_speed = _model_speed(speed)
+    return wav if model_speed == speed else time_stretch(wav, speed / model_speed)
+
+def synthesize_passage(text, speed, model_name=MODEL_NAME, background=False):
+    """
+    Assemble a passage from cached and freshly synthesized sentences
+    
+    In stretch mode the sentences come from the 1.0x sentence cache and each
+    is stretched on its own (sentence boundaries are silent, so there are no
+    seams, and memory stays bounded for whole chapters).
+    """
+    parts = synthesize_sentences(split_sentences(text), _model_speed(speed), model_name, background)
+    parts = [_apply_speed(part, speed) for part in parts]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+
+def text_to_speech(text, speed=1.0, model_name=MODEL_NAME):
     """
     Convert text to speech using Coqui TTS
     
     Args:
         text: Text to synthesize (max 5000 characters)
         speed: Speech speed (0.5 = slow, 1.0 = normal, 2.0 = fast)
+        model_name: One of AVAILABLE_MODELS (the public API always uses MODEL_NAME)
     
     Returns:
-        Tuple of (sample_rate, audio_array)
+        Tuple of (sample_rate, int16 audio_array)
     """
+    start_time = time.perf_counter()
     try:
-        # Validate input
-        if not text or len(text.strip()) == 0:
-            logger.warning("Empty text received")
+        model_name = _resolve_model(model_name)
+        text, speed = _prepare_input(text, speed)
+        if text is None:
             return None
         
-        # Limit text length to prevent abuse
-        if len(text) > 5000:
-            logger.warning(f"Text too long ({len(text)} chars), truncating to 5000")
-            text = text[:5000]
-        
-        # Validate speed
-        speed = max(0.5, min(2.0, speed))
+        cache_key = make_cache_key(model_name, text, speed)
+        cached = audio_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Cache hit for {len(text)} characters at {speed}x speed")
+            return (_sample_rate(model_name), cached)
         
         logger.info(f"Synthesizing {len(text)} characters at {speed}x speed")
         
-        # Generate audio
-        wav = tts.tts(text=text, speed=speed)
-        
-        # Convert to numpy array
-        wav_array = np.array(wav)
+        # Generate audio from cached sentences plus new ones (batched with concurrent requests)
+        with admission.admit(len(text)):
+            wav_array = synthesize_passage(text, speed, model_name)
+        audio_cache.put(cache_key, wav_array)
         
         logger.info(f"✅ Generated {len(wav_array)} audio samples")
         
         # Return sample rate and audio
-        return (22050, wav_array)
+        return (_sample_rate(model_name), wav_array)
         
+    except Overloaded as e:
+        raise gr.Error(f"{e}, retry in {e.retry_after}s")
     except Exception as e:
         logger.error(f"❌ Error during synthesis: {e}")
         raise gr.Error(f"Failed to generate speech: {str(e)}")
+    finally:
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, endpoint="text_to_speech")
+
+def text_to_speech_stream(text, speed=1.0, model_name=MODEL_NAME):
+    """
+    Stream speech sentence by sentence so playback can start early
+    
+    Args:
+        text: Text to synthesize (max 5000 characters)
+        speed: Speech speed (0.5 = slow, 1.0 = normal, 2.0 = fast)
+        model_name: One of AVAILABLE_MODELS
+    
+    Yields:
+        Tuples of (sample_rate, audio_array), one per sentence
+    """
+    start_time = time.perf_counter()
+    try:
+        model_name = _resolve_model(model_name)
+        text, speed = _prepare_input(text, speed)
+        if text is None:
+            return
+        
+        sample_rate = _sample_rate(model_name)
+        sentences = split_sentences(text)
+        logger.info(f"Streaming {len(text)} characters as {len(sentences)} sentences at {speed}x speed")
+        
+        with admission.admit(len(text)):
+            # All sentences are queued up front, so later ones synthesize while earlier ones play
+            for index, wav in enumerate(iter_sentence_audio(sentences, _model_speed(speed), model_name, stream=True)):
+                wav = _apply_speed(wav, speed)
+                if index == 0:
+                    first_chunk_time = time.perf_counter() - start_time
+                    FIRST_AUDIO_LATENCY.observe(first_chunk_time)
+                    logger.info(f"⏱️ First audio chunk after {first_chunk_time:.2f}s")
+                yield (sample_rate, wav)
+        
+        logger.info(f"✅ Streamed {len(sentences)} chunks in {time.perf_counter() - start_time:.2f}s")
+        
+    except Overloaded as e:
+        raise gr.Error(f"{e}, retry in {e.retry_after}s")
+    except Exception as e:
+        logger.error(f"❌ Error during streaming synthesis: {e}")
+        raise gr.Error(f"Failed to generate speech: {str(e)}")
+    finally:
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, endpoint="text_to_speech_stream")
+
+def synthesize_chapter(text, speed=1.0, model_name=MODEL_NAME, background=False):
+    """
+    Synthesize a full chapter
+    
+    All sentences are submitted at once, so they share batched vocoder passes
+    and spread across workers, then joined in order. Sentence audio is cached,
+    so re-opening a chapter (or repeated lines across chapters) costs nothing.
+    
+    Returns:
+        Audio array for the whole chapter, or None for empty text
+    """
+    if not text or len(text.strip()) == 0:
+        logger.warning("Empty chapter received")
+        return None
+    
+    text = normalize_text(text)
+    if len(text) > CHAPTER_MAX_CHARS:
+        raise ValueError(f"Chapter too long ({len(text)} chars, max {CHAPTER_MAX_CHARS})")
+    speed = max(0.5, min(2.0, speed))
+    
+    logger.info(f"Synthesizing chapter of {len(text)} characters at {speed}x speed")
+    start_time = time.perf_counter()
+    audio = synthesize_passage(text, speed, model_name, background)
+    logger.info(f"✅ Chapter synthesized in {time.perf_counter() - start_time:.1f}s")
+    return audio
+
+def _run_job(text, speed, model_name):
+    """Background job body, behind interactive requests in the batcher; its latency is recorded like any other endpoint"""
+    with REQUEST_LATENCY.time(endpoint="job"):
+        return synthesize_chapter(text, speed, model_name, background=True)
+
+job_queue = JobQueue(
+    _run_job,
+    max_queued=JOB_MAX_QUEUED,
+    num_threads=JOB_THREADS,
+    max_finished_bytes=JOB_MAX_FINISHED_MB * 1024 * 1024
+)
+
+def chapter_to_file(text, speed=1.0, fmt="ogg"):
+    """Synthesize a chapter into a compressed audio file for download"""
+    start_time = time.perf_counter()
+    try:
+        with admission.admit(len(text or "")):
+            audio = synthesize_chapter(text, speed)
+        if audio is None:
+            return None
+        with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as f:
+            f.write(encode_audio(audio, SAMPLE_RATE, fmt))
+        return f.name
+    except Overloaded as e:
+        raise gr.Error(f"{e}, retry in {e.retry_after}s")
+    except Exception as e:
+        logger.error(f"❌ Error during chapter synthesis: {e}")
+        raise gr.Error(f"Failed to generate chapter audio: {str(e)}")
+    finally:
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, endpoint="chapter_to_file")
+
+def readiness():
+    """Startup state (model load/warm-up timings); "degraded" if a worker process has died since"""
+    status = startup.status()
+    if status["status"] == "ready" and worker_pool is not None and not worker_pool.alive():
+        status["status"] = "degraded"
+    return status
+
+def phoneme_cache_stats():
+    """Front-end (text cleaning/phonemizer) cache stats, summed over the worker processes when enabled"""
+    if worker_pool is not None:
+        return combine_stats(list(worker_pool.phoneme_stats.values()))
+    return PHONEME_CACHE.stats()
+
+def cache_stats():
+    """Hit/miss counters and sizes of the audio and front-end caches, and admission counters"""
+    return {
+        "passages": audio_cache.stats(),
+        "sentences": sentence_cache.stats(),
+        "phonemes": phoneme_cache_stats(),
+        "admission": admission.stats(),
+    }
+
+def model_stats():
+    """Selectable models and, when synthesizing in-process, what the registry holds"""
+    return {
+        "default": MODEL_NAME,
+        "available": AVAILABLE_MODELS,
+        # With worker processes every worker keeps its own registry
+        "registry": models.stats() if models is not None else None,
+    }
 
 # Create Gradio interface
-demo = gr.Interface(
+full_demo = gr.Interface(
     fn=text_to_speech,
     inputs=[
         gr.Textbox(
@@ -106,13 +570,316 @@ demo = gr.Interface(
         ["Fast speech example for testing purposes.", 1.5],
         ["IReader uses this TTS service to read books aloud with natural-sounding voices.", 1.0]
     ],
-    cache_examples=False
+    cache_examples=False,
+    api_name="text_to_speech"
 )
 
+# Streaming variant: audio starts playing after the first sentence is synthesized
+stream_demo = gr.Interface(
+    fn=text_to_speech_stream,
+    inputs=[
+        gr.Textbox(
+            label="Text to Synthesize",
+            placeholder="Enter your text here (max 5000 characters)...",
+            lines=5,
+            max_lines=10
+        ),
+        gr.Slider(
+            minimum=0.5,
+            maximum=2.0,
+            value=1.0,
+            step=0.1,
+            label="Speed (0.5 = slow, 1.0 = normal, 2.0 = fast)"
+        )
+    ],
+    outputs=gr.Audio(
+        label="Streamed Speech",
+        type="numpy",
+        streaming=True,
+        autoplay=True
+    ),
+    title="🎙️ Coqui TTS - Streaming",
+    description="""
+    Audio is synthesized one sentence at a time and starts playing as soon as
+    the first sentence is ready, instead of waiting for the whole passage.
+    """,
+    cache_examples=False,
+    api_name="text_to_speech_stream"
+)
+
+# Same as the main tab, with the voice picked from the configured models
+voice_demo = gr.Interface(
+    fn=text_to_speech,
+    inputs=[
+        gr.Textbox(
+            label="Text to Synthesize",
+            placeholder="Enter your text here (max 5000 characters)...",
+            lines=5,
+            max_lines=10
+        ),
+        gr.Slider(
+            minimum=0.5,
+            maximum=2.0,
+            value=1.0,
+            step=0.1,
+            label="Speed (0.5 = slow, 1.0 = normal, 2.0 = fast)"
+        ),
+        gr.Dropdown(
+            choices=AVAILABLE_MODELS,
+            value=MODEL_NAME,
+            label="Model"
+        )
+    ],
+    outputs=gr.Audio(
+        label="Generated Speech",
+        type="numpy"
+    ),
+    title="🗣️ Voices",
+    description="""
+    Models other than the default are loaded on first use, so the first request
+    for a voice takes longer. Rarely used models are unloaded when memory runs low.
+    """,
+    api_name="text_to_speech_model"
+)
+
+stats_demo = gr.Interface(
+    fn=cache_stats,
+    inputs=[],
+    outputs=gr.JSON(label="Audio Cache"),
+    title="📊 Cache Statistics",
+    api_name="cache_stats"
+)
+
+# Whole chapters, returned as a compressed file instead of raw samples
+chapter_demo = gr.Interface(
+    fn=chapter_to_file,
+    inputs=[
+        gr.Textbox(
+            label="Chapter Text",
+            placeholder=f"Paste a full chapter (max {CHAPTER_MAX_CHARS} characters)...",
+            lines=10,
+            max_lines=30
+        ),
+        gr.Slider(
+            minimum=0.5,
+            maximum=2.0,
+            value=1.0,
+            step=0.1,
+            label="Speed (0.5 = slow, 1.0 = normal, 2.0 = fast)"
+        ),
+        gr.Dropdown(
+            choices=sorted(MEDIA_TYPES),
+            value="ogg",
+            label="Format (ogg = Opus)"
+        )
+    ],
+    outputs=gr.File(label="Chapter Audio"),
+    title="📖 Chapter Synthesis",
+    description="""
+    Synthesizes a full chapter in one request. The text is split into sentences
+    internally, sentences are synthesized in parallel and joined in order, and the
+    result is returned as compressed audio.
+    """,
+    api_name="chapter_to_file"
+)
+
+demo = gr.TabbedInterface(
+    [full_demo, stream_demo, voice_demo, chapter_demo, stats_demo],
+    tab_names=["Synthesize", "Stream", "Voices", "Chapter", "Cache"],
+    title="🎙️ Coqui TTS - High Quality Text-to-Speech"
+)
+
+# Let every request admission control may hold reach it (running or waiting), and bound
+# Gradio's own queue the same way so bursts are turned away instead of piling up there
+demo.queue(
+    default_concurrency_limit=ADMISSION_CONCURRENCY + ADMISSION_MAX_QUEUE,
+    max_size=ADMISSION_MAX_QUEUE
+)
+
+# Plain HTTP routes served next to the Gradio UI
+server = FastAPI(title="Coqui TTS")
+
+class ChapterRequest(BaseModel):
+    text: str
+    speed: float = 1.0
+    format: str = "ogg"
+    model: Optional[str] = None
+
+@server.post("/v1/chapter")
+def chapter_endpoint(request: ChapterRequest):
+    """Synthesize a full chapter and return it as compressed audio bytes"""
+    if request.format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{request.format}'")
+    model_name = _get_model(request.model)
+    with REQUEST_LATENCY.time(endpoint="v1_chapter"):
+        try:
+            with admission.admit(len(request.text)):
+                audio = synthesize_chapter(request.text, request.speed, model_name)
+        except Overloaded as e:
+            return _overloaded_response(e)
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        if audio is None:
+            raise HTTPException(status_code=400, detail="Empty text")
+        content = encode_audio(audio, _sample_rate(model_name), request.format)
+    return Response(content=content, media_type=MEDIA_TYPES[request.format])
+
+class JobRequest(BaseModel):
+    text: str
+    speed: float = 1.0
+    priority: int = 0
+    model: Optional[str] = None
+
+def _overloaded_response(error):
+    return JSONResponse(status_code=503, content={"detail": str(error)},
+                        headers={"Retry-After": str(error.retry_after)})
+
+def _get_model(model_name):
+    try:
+        return _resolve_model(model_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+@server.post("/v1/jobs", status_code=202)
+def submit_job(request: JobRequest):
+    """Queue text for background synthesis (higher priority runs first) and return the job id"""
+    if not request.text or len(request.text.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Empty text")
+    if len(request.text) > CHAPTER_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text too long (max {CHAPTER_MAX_CHARS} characters)")
+    try:
+        job = job_queue.submit(normalize_text(request.text), max(0.5, min(2.0, request.speed)), request.priority,
+                               _get_model(request.model))
+    except JobQueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "30"})
+    return job.to_dict()
+
+@server.get("/v1/jobs/{job_id}")
+def job_status(job_id: str, wait: float = 0.0):
+    """Job status; with ?wait=N blocks up to N seconds (max 60) for the job to finish"""
+    job = _get_job(job_id)
+    if wait > 0:
+        job_queue.wait(job_id, min(wait, 60.0))
+    return job.to_dict()
+
+@server.get("/v1/jobs/{job_id}/audio")
+def job_audio(job_id: str, format: str = "ogg"):
+    """Fetch the audio of a finished job as compressed bytes"""
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+    job = _get_job(job_id)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}" + (f": {job.error}" if job.error else ""))
+    return Response(content=encode_audio(job.result, _sample_rate(job.model_name), format), media_type=MEDIA_TYPES[format])
+
+@server.get("/v1/models")
+def list_models():
+    """Selectable models; pass one as "model" to /v1/chapter or /v1/jobs"""
+    return model_stats()
+
+# /v1/tts also serves raw little-endian 16-bit mono PCM ("pcm"); compressed bodies are sent in chunks of this size
+BINARY_MEDIA_TYPES = dict(MEDIA_TYPES, pcm="application/octet-stream")
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def _binary_tts(text, speed, model_name, fmt):
+    """
+    Body of a /v1/tts response
+    
+    The first chunk is yielded right after admission (the WAV header, or b""),
+    so the endpoint can still answer 503 before the response starts. PCM and
+    WAV then stream sentence by sentence as they are synthesized; compressed
+    formats are encoded once the passage is complete.
+    """
+    start_time = time.perf_counter()
+    cache_key = make_cache_key(model_name, text, speed)
+    audio = audio_cache.get(cache_key)
+    ticket = admission.acquire(len(text)) if audio is None else None
+    try:
+        if fmt == "wav":
+            yield wav_header(_sample_rate(model_name), len(audio) if audio is not None else None)
+        else:
+            yield b""
+        
+        if audio is None:
+            parts = []
+            for wav in iter_sentence_audio(split_sentences(text), _model_speed(speed), model_name, stream=True):
+                parts.append(_apply_speed(wav, speed))
+                if fmt in ("pcm", "wav"):
+                    yield parts[-1].tobytes()
+            admission.release(ticket)
+            ticket = None
+            audio = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+            audio_cache.put(cache_key, audio)
+            if fmt in ("pcm", "wav"):
+                return
+        
+        data = audio.tobytes() if fmt in ("pcm", "wav") else encode_audio(audio, _sample_rate(model_name), fmt)
+        for start in range(0, len(data), STREAM_CHUNK_BYTES):
+            yield data[start:start + STREAM_CHUNK_BYTES]
+    except Exception as e:
+        logger.error(f"❌ Error during binary synthesis: {e}")
+        raise
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, endpoint="v1_tts")
+
+def _binary_response(text, speed, fmt, model):
+    if fmt not in BINARY_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+    model_name = _get_model(model)
+    text, speed = _prepare_input(text, speed)
+    if text is None:
+        raise HTTPException(status_code=400, detail="Empty text")
+    
+    chunks = _binary_tts(text, speed, model_name, fmt)
+    try:
+        first = next(chunks)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    headers = {}
+    if fmt in ("pcm", "wav"):
+        headers = {"X-Sample-Rate": str(_sample_rate(model_name)), "X-Channels": "1", "X-Sample-Format": "s16le"}
+    # No Content-Length: the body goes out with chunked transfer encoding as it is produced
+    return StreamingResponse(itertools.chain([first], chunks), media_type=BINARY_MEDIA_TYPES[fmt], headers=headers)
+
+class TTSRequest(BaseModel):
+    text: str
+    speed: float = 1.0
+    format: str = "wav"
+    model: Optional[str] = None
+
+@server.post("/v1/tts")
+def tts_endpoint(request: TTSRequest):
+    """Synthesize text (max 5000 characters) and stream it back as binary audio"""
+    return _binary_response(request.text, request.speed, request.format, request.model)
+
+@server.get("/v1/tts")
+def tts_query_endpoint(text: str, speed: float = 1.0, format: str = "wav", model: Optional[str] = None):
+    """Same as POST /v1/tts with query parameters, so a media player can stream straight from the URL"""
+    return _binary_response(text, speed, format, model)
+
+@server.get("/ready")
+def ready_endpoint():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before that or if synthesis is broken"""
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+@server.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of latency, throughput, queue and cache metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+app = gr.mount_gradio_app(server, demo, path="/")
+
 if __name__ == "__main__":
+    import uvicorn
+    
     logger.info("🚀 Starting Coqui TTS service...")
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        show_error=True
-    )
+    uvicorn.run(app, host="0.0.0.0", port=7860)
@@ -0,0 +1,187 @@
+"""
+Two-tier cache for synthesized audio.
+
+Entries live in an in-memory LRU bounded by a byte budget and are written
+through to an on-disk store that evicts least-recently-used files once it
+grows past its own size budget. Disk hits are promoted back into memory.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Bumped whenever the stored sample format changes, so stale disk entries are never served
+CACHE_FORMAT = 'pcm16'
+
+
+def make_cache_key(model_name: str, text: str, speed: float) -> str:
+    """Stable key for a synthesized passage. Text is expected to be normalized already."""
+    payload = f"{CACHE_FORMAT}\x00{model_name}\x00{speed:.2f}\x00{text}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Thread-safe audio cache with a memory tier and an optional disk tier
+
+    Args:
+        memory_budget_bytes: Max bytes of audio kept in memory
+        disk_dir: Directory for the disk tier (None disables it)
+        disk_budget_bytes: Max bytes of audio kept on disk (0 disables the disk tier)
+    """
+
+    def __init__(self, memory_budget_bytes: int, disk_dir: Optional[str] = None, disk_budget_bytes: int = 0):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir and disk_budget_bytes > 0 else None
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir is not None:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU order from file modification times."""
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.disk_dir.glob('*/*.npy'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        logger.info(f"Audio disk cache: {len(self._disk_index)} entries, {self._disk_bytes / 1e6:.1f} MB in {self.disk_dir}")
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return cached audio for key, or None on a miss."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            on_disk = self.disk_dir is not None and key in self._disk_index
+
+        if on_disk:
+            path = self._disk_path(key)
+            try:
+                audio = np.load(path)
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping unreadable cache file {path}: {e}")
+                with self._lock:
+                    self._drop_disk_entry(key)
+                audio = None
+            if audio is not None:
+                audio.flags.writeable = False
+                with self._lock:
+                    if key in self._disk_index:
+                        self._disk_index.move_to_end(key)
+                    self.disk_hits += 1
+                    self._put_memory(key, audio)
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: np.ndarray):
+        """Store audio in memory and write it through to disk."""
+        audio.flags.writeable = False
+        with self._lock:
+            self._put_memory(key, audio)
+            if self.disk_dir is None or key in self._disk_index:
+                return
+
+        # Concurrent misses on the same key may both get here: each writes its own temp file,
+        # and the index only counts the key once
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, audio)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"Failed to write cache file {path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_bytes += size - self._disk_index.get(key, 0)
+            self._disk_index[key] = size
+            self._disk_index.move_to_end(key)
+            self._evict_disk()
+
+    def _put_memory(self, key: str, audio: np.ndarray):
+        if audio.nbytes > self.memory_budget_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = audio
+        self._memory_bytes += audio.nbytes
+        while self._memory_bytes > self.memory_budget_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _drop_disk_entry(self, key: str):
+        size = self._disk_index.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        try:
+            self._disk_path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_budget_bytes and self._disk_index:
+            oldest = next(iter(self._disk_index))
+            self._drop_disk_entry(oldest)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk_index),
+                'disk_bytes': self._disk_bytes,
+            }
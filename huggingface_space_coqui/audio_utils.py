@@ -0,0 +1,161 @@
+"""
+Audio conversion and encoding helpers for the Coqui TTS space.
+
+Synthesized audio is kept as 16-bit PCM end to end (a quarter of the
+float64 array the model output used to be turned into). Long-form
+responses are returned compressed: Opus in an OGG container by default
+(about 24 kbps for speech), MP3, or 16-bit WAV.
+"""
+
+import io
+import logging
+import struct
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import istft, resample_poly, stft
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    'ogg': 'audio/ogg',
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+}
+
+# Samples converted per step when writing float audio into an int16 buffer
+PCM_CHUNK_SAMPLES = 65536
+
+# Opus only accepts 8/12/16/24/48 kHz input; 24 kHz keeps the full band of a 22.05 kHz voice
+OPUS_SAMPLE_RATE = 24000
+
+# Phase vocoder frame (about 46 ms at 22.05 kHz) and hop (75% overlap)
+STRETCH_FFT_SIZE = 1024
+STRETCH_HOP = 256
+
+
+def to_int16(samples, out: np.ndarray = None) -> np.ndarray:
+    """
+    Write float audio into an int16 PCM buffer
+
+    Accepts a float array or the plain Python list Coqui returns and converts it
+    in fixed-size float32 chunks, so no full-length float64 copy is ever made.
+
+    Args:
+        samples: Float audio in [-1, 1]
+        out: Preallocated int16 buffer of len(samples) (allocated if None)
+
+    Returns:
+        The int16 buffer
+    """
+    if out is None:
+        out = np.empty(len(samples), dtype=np.int16)
+    scratch = np.empty(min(len(samples), PCM_CHUNK_SAMPLES), dtype=np.float32)
+    for start in range(0, len(samples), PCM_CHUNK_SAMPLES):
+        chunk = samples[start:start + PCM_CHUNK_SAMPLES]
+        view = scratch[:len(chunk)]
+        view[:] = chunk
+        np.multiply(view, 32767, out=view)
+        np.rint(view, out=view)
+        np.clip(view, -32768, 32767, out=view)
+        out[start:start + len(chunk)] = view
+    return out
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Polyphase resampling between two integer sample rates."""
+    if source_rate == target_rate:
+        return samples
+    divisor = gcd(source_rate, target_rate)
+    return resample_poly(samples, target_rate // divisor, source_rate // divisor).astype(np.float32, copy=False)
+
+
+def time_stretch(samples: np.ndarray, rate: float) -> np.ndarray:
+    """
+    Change the tempo of int16 audio without changing its pitch
+
+    Phase vocoder: the STFT frames are resampled in time (rate > 1 = faster,
+    shorter output), magnitudes are interpolated and phases re-accumulated so
+    harmonics stay continuous. Every step works on whole spectrogram arrays.
+
+    Args:
+        samples: int16 mono audio
+        rate: Speed factor (2.0 = twice as fast)
+
+    Returns:
+        int16 audio of about len(samples) / rate samples
+    """
+    if rate == 1.0 or len(samples) == 0:
+        return samples
+    target_length = int(round(len(samples) / rate))
+    overlap = STRETCH_FFT_SIZE - STRETCH_HOP
+    # Inputs shorter than one frame are padded with silence; only target_length samples are kept
+    padding = max(0, STRETCH_FFT_SIZE - len(samples))
+    _, _, spectrum = stft(np.pad(samples, (0, padding)).astype(np.float32) / 32768, window='hann',
+                          nperseg=STRETCH_FFT_SIZE, noverlap=overlap)
+
+    steps = np.arange(0, spectrum.shape[1], rate)
+    frames = np.floor(steps).astype(np.int64)
+    alpha = (steps - frames).astype(np.float32)[np.newaxis, :]
+    # Two zero frames at the end so frames + 1 is always valid
+    spectrum = np.pad(spectrum, ((0, 0), (0, 2)))
+    left = spectrum[:, frames]
+    right = spectrum[:, frames + 1]
+    magnitude = (1 - alpha) * np.abs(left) + alpha * np.abs(right)
+
+    # Phase advance of each bin over one hop, plus its measured deviation (wrapped to [-pi, pi])
+    expected = (2 * np.pi * STRETCH_HOP / STRETCH_FFT_SIZE * np.arange(spectrum.shape[0]))[:, np.newaxis]
+    deviation = np.angle(right) - np.angle(left) - expected
+    deviation -= 2 * np.pi * np.round(deviation / (2 * np.pi))
+    phase = np.empty(magnitude.shape, dtype=np.float32)
+    phase[:, 0] = np.angle(spectrum[:, 0])
+    phase[:, 1:] = phase[:, :1] + np.cumsum(expected + deviation, axis=1)[:, :-1]
+
+    _, stretched = istft(magnitude * np.exp(1j * phase), window='hann', nperseg=STRETCH_FFT_SIZE, noverlap=overlap)
+    out = np.zeros(target_length, dtype=np.int16)
+    to_int16(stretched[:target_length], out=out[:min(target_length, len(stretched))])
+    return out
+
+
+def wav_header(sample_rate: int, num_samples: int = None) -> bytes:
+    """
+    44-byte header of a mono 16-bit PCM WAV file
+
+    With num_samples=None the sizes are set to the maximum, the usual marker
+    for a WAV whose length isn't known yet because it is still being streamed.
+    """
+    data_size = 0xFFFFFFFF - 36 if num_samples is None else num_samples * 2
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', data_size + 36, b'WAVE', b'fmt ', 16, 1, 1,
+                       sample_rate, sample_rate * 2, 2, 16, b'data', data_size)
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int, fmt: str = 'ogg') -> bytes:
+    """
+    Encode mono audio into a compressed container
+
+    Args:
+        samples: Mono audio, float in [-1, 1] or int16
+        sample_rate: Sample rate of samples
+        fmt: One of MEDIA_TYPES ('ogg' = Opus, falls back to Vorbis if libsndfile lacks Opus)
+
+    Returns:
+        Encoded file contents
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported audio format '{fmt}', expected one of {sorted(MEDIA_TYPES)}")
+    buffer = io.BytesIO()
+    if fmt == 'ogg':
+        if 'OPUS' in sf.available_subtypes('OGG'):
+            if samples.dtype == np.int16:
+                samples = samples.astype(np.float32) / 32768
+            sf.write(buffer, resample(samples, sample_rate, OPUS_SAMPLE_RATE), OPUS_SAMPLE_RATE,
+                     format='OGG', subtype='OPUS')
+        else:
+            logger.warning("libsndfile has no Opus support, encoding OGG Vorbis instead")
+            sf.write(buffer, samples, sample_rate, format='OGG', subtype='VORBIS')
+    elif fmt == 'mp3':
+        sf.write(buffer, samples, sample_rate, format='MP3', subtype='MPEG_LAYER_III')
+    else:
+        sf.write(buffer, samples, sample_rate, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
@@ -0,0 +1,110 @@
+"""
+Micro-batching scheduler for concurrent synthesis requests.
+
+Requests submitted from many Gradio worker threads are gathered for a short
+window (or until the batch is full) and handed to a single batch function,
+whose results are split back to the waiting callers through futures.
+
+Waiting items are taken cheapest request first, like admission control, so
+the sentences of a short passage don't queue behind every sentence of a
+chapter admitted just before it.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collect submitted items into batches and run them with one call
+
+    Args:
+        batch_fn: Called with a list of items, must return one result per item in the same order
+        max_batch_size: Run the batch as soon as this many items are waiting
+        window_ms: Max time to wait for more items after the first one arrives
+        concurrency: Max batches running at once; while all slots are busy new
+            items keep accumulating so the next batch is fuller
+        aging_chars_per_second: How much a waiting item's cost drops per second waited
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 8,
+                 window_ms: float = 25, concurrency: int = 1, name: str = "micro-batcher",
+                 aging_chars_per_second: float = 100.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self.aging_chars_per_second = aging_chars_per_second
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._slots = threading.Semaphore(max(1, concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=name)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any, cost: float = 0, background: bool = False, solo: bool = False) -> Future:
+        """
+        Queue an item; the returned future resolves to its result.
+
+        Args:
+            cost: Cost (characters) of the request the item belongs to; cheaper requests go first,
+                and the cost counts down while the item waits so expensive requests are not starved
+            background: Only run the item while no foreground item is waiting
+            solo: Run the item in a batch of its own, so it is not held up by the items queued with it
+        """
+        future = Future()
+        # cost - aging * (now - enqueued) orders the same at any later time as this fixed rank
+        rank = cost + self.aging_chars_per_second * time.monotonic()
+        self._queue.put((background, rank, next(self._sequence), item, future, solo))
+        return future
+
+    def qsize(self) -> int:
+        """Number of items waiting for a batch."""
+        return self._queue.qsize()
+
+    def _collect(self) -> list:
+        """Up to max_batch_size (item, future) pairs, in priority order."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size and not batch[0][-1]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry[-1]:
+                # Solo items start the next batch instead
+                self._queue.put(entry)
+                break
+            batch.append(entry)
+        return [(item, future) for _, _, _, item, future, _ in batch]
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                self._slots.release()
+                continue
+            self._executor.submit(self._execute, batch)
+
+    def _execute(self, batch: list):
+        logger.info(f"Running micro-batch of {len(batch)} request(s)")
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
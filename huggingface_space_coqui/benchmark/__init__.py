@@ -0,0 +1 @@
+"""Load-testing tools for the Coqui TTS space (see README, "Benchmarking")."""
@@ -0,0 +1,100 @@
+"""
+Front-end (text cleaning + phonemization) benchmark for the phoneme cache.
+
+Times `tokenizer.text_to_ids()` over every sentence of a set of chapters,
+first with the stock tokenizer and then with a fresh `PhonemeCache`
+installed, reading the chapters in order the way a listener would. Only the
+front end runs; no acoustic model or vocoder time is included.
+
+Chapters come from a directory of "Chapter NNN - Title.txt" files (the
+test_local_novel/ layout) or, by default, from the load generator's
+synthetic prose. Synthetic text reuses a tiny vocabulary, so its hit ratios
+are an upper bound; use real chapters for realistic numbers.
+
+Usage (from huggingface_space_coqui/):
+    python -m benchmark.frontend_bench --model tts_models/en/ljspeech/fast_pitch
+    python -m benchmark.frontend_bench --chapters ../test_local_novel --output frontend.json
+    python -m benchmark.frontend_bench --chapters ../test_local_novel --mode words
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import List
+
+from benchmark.load_test import make_text
+from phoneme_cache import PhonemeCache
+from text_processing import normalize_sentence, split_sentences
+
+
+def load_chapters(directory: str) -> List[str]:
+    return [path.read_text(encoding='utf-8') for path in sorted(Path(directory).glob('Chapter *.txt'))]
+
+
+def synthetic_chapters(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [make_text(rng, 15000, 25000) for _ in range(count)]
+
+
+def time_front_end(tokenizer, sentences: List[str]) -> float:
+    start_time = time.perf_counter()
+    for sentence in sentences:
+        tokenizer.text_to_ids(sentence)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TTS front end with and without the phoneme cache")
+    parser.add_argument('--model', default="tts_models/en/ljspeech/fast_pitch")
+    parser.add_argument('--chapters', help="Directory of 'Chapter NNN - Title.txt' files (default: synthetic text)")
+    parser.add_argument('--synthetic-chapters', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=20000, help="Cache entries per level")
+    parser.add_argument('--mode', choices=['exact', 'words'], default='exact', help="Phoneme cache mode")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Write results JSON here")
+    args = parser.parse_args()
+
+    from TTS.api import TTS
+
+    chapters = load_chapters(args.chapters) if args.chapters else synthetic_chapters(args.synthetic_chapters, args.seed)
+    if not chapters:
+        parser.error(f"No 'Chapter *.txt' files in {args.chapters}")
+    # Same sentences the service sends to the model
+    chapter_sentences = [[normalize_sentence(sentence) for sentence in split_sentences(text)] for text in chapters]
+
+    tts = TTS(args.model)
+    tokenizer = tts.synthesizer.tts_model.tokenizer
+    print(f"{args.model}: use_phonemes={tokenizer.use_phonemes}, "
+          f"{len(chapters)} chapters, {sum(len(s) for s in chapter_sentences)} sentences")
+
+    # Phonemizers keep lexicon caches of their own; one untimed pass puts both timings on the same footing
+    for sentences in chapter_sentences:
+        time_front_end(tokenizer, sentences)
+    uncached = [time_front_end(tokenizer, sentences) for sentences in chapter_sentences]
+    cache = PhonemeCache(args.entries, args.mode)
+    cache.install(tts, args.model)
+    cached = [time_front_end(tokenizer, sentences) for sentences in chapter_sentences]
+
+    print(f"{'chapter':>7} {'chars':>7} {'stock s':>9} {'cached s':>9} {'speedup':>8}")
+    rows = []
+    for index, (text, before, after) in enumerate(zip(chapters, uncached, cached), start=1):
+        rows.append({'chapter': index, 'characters': len(text), 'stock_seconds': before, 'cached_seconds': after})
+        print(f"{index:>7} {len(text):>7} {before:9.3f} {after:9.3f} {before / max(after, 1e-9):7.1f}x")
+    print(f"{'total':>7} {sum(map(len, chapters)):>7} {sum(uncached):9.3f} {sum(cached):9.3f} "
+          f"{sum(uncached) / max(sum(cached), 1e-9):7.1f}x")
+
+    stats = cache.stats()
+    for level, level_stats in stats.items():
+        print(f"{level}: {level_stats['hits']} hits / {level_stats['misses']} misses "
+              f"(hit ratio {level_stats['hit_ratio']:.2f}), {level_stats['entries']} entries")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model': args.model, 'mode': args.mode, 'chapters': rows, 'cache': stats}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
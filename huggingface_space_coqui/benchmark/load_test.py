@@ -0,0 +1,263 @@
+"""
+Load generator for the Coqui TTS space.
+
+Drives the service at a series of concurrency levels (closed loop: every
+client sends its next request as soon as the previous one returns) with a
+chosen text-length mix, and reports latency percentiles and throughput for
+each level. Texts are generated from a fixed seed and are practically never
+repeated, so the audio caches don't flatter the numbers.
+
+Targets:
+    inproc  imports app.py and calls text_to_speech() from client threads
+    http    POSTs to a running server, either the raw-audio /v1/tts endpoint
+            (PCM, default) or /v1/chapter (WAV)
+
+Usage (from huggingface_space_coqui/):
+    python -m benchmark.load_test --concurrency 1,4,8 --mix mixed --output results.json
+    python -m benchmark.load_test --target http --url http://localhost:7860 --output http.json
+    python -m benchmark.load_test --target http --endpoint chapter --output chapter.json
+    python -m benchmark.load_test --compare baseline.json --output results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Text-length mixes: (weight, min_chars, max_chars) buckets
+TEXT_MIXES = {
+    'short': [(1.0, 60, 160)],
+    'medium': [(1.0, 400, 800)],
+    'long': [(1.0, 2000, 4000)],
+    'mixed': [(0.6, 60, 160), (0.3, 400, 800), (0.1, 2000, 4000)],
+}
+
+_WORDS = (
+    "the a cultivator sword mountain sect elder young master spirit stone heaven "
+    "he she said quietly laughed turned looked toward ancient formation broke "
+    "light shadow through silent valley before after never again within moment "
+    "qi realm breakthrough disciple palace storm river blood jade token ring"
+).split()
+
+
+def make_text(rng: random.Random, min_chars: int, max_chars: int) -> str:
+    """Random prose of min_chars..max_chars characters, split into sentences."""
+    target = rng.randint(min_chars, max_chars)
+    sentences = []
+    length = 0
+    while length < target:
+        words = rng.choices(_WORDS, k=rng.randint(5, 16))
+        sentence = ' '.join(words).capitalize() + rng.choice('..?!')
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def make_texts(mix: str, count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    buckets = TEXT_MIXES[mix]
+    weights = [weight for weight, _, _ in buckets]
+    return [make_text(rng, *rng.choices(buckets, weights)[0][1:]) for _ in range(count)]
+
+
+class InProcessTarget:
+    """Calls app.text_to_speech() directly; returns the audio duration in seconds."""
+    name = 'inproc'
+
+    def __init__(self):
+        import app
+
+        # Keep the startup warm-up out of the measurements
+        app.startup.wait()
+        self.app = app
+
+    def __call__(self, text: str, speed: float) -> float:
+        sample_rate, audio = self.app.text_to_speech(text, speed)
+        return len(audio) / sample_rate
+
+
+class HttpTarget:
+    """POSTs to a running server's /v1/tts (raw PCM) or /v1/chapter (WAV) and returns the audio duration."""
+    name = 'http'
+
+    def __init__(self, url: str, endpoint: str = 'tts', timeout: float = 300.0):
+        self.endpoint = endpoint
+        self.url = url.rstrip('/') + f'/v1/{endpoint}'
+        self.timeout = timeout
+
+    def __call__(self, text: str, speed: float) -> float:
+        import soundfile as sf
+
+        fmt = 'pcm' if self.endpoint == 'tts' else 'wav'
+        body = json.dumps({'text': text, 'speed': speed, 'format': fmt}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read()
+            sample_rate = response.headers.get('X-Sample-Rate')
+        if fmt == 'pcm':
+            return len(data) / 2 / int(sample_rate)
+        return sf.info(io.BytesIO(data)).duration
+
+
+def run_level(target, texts: List[str], concurrency: int, speed: float) -> Dict:
+    """Send all texts with `concurrency` clients and summarize latency and throughput."""
+    lock = threading.Lock()
+    pending = iter(texts)
+    latencies = []
+    errors = []
+    audio_seconds = [0.0]
+    characters = [0]
+
+    def client():
+        while True:
+            with lock:
+                text = next(pending, None)
+            if text is None:
+                return
+            start = time.perf_counter()
+            try:
+                duration = target(text, speed)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                audio_seconds[0] += duration
+                characters[0] += len(text)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    latency_ms = np.asarray(latencies) * 1000
+    return {
+        'concurrency': concurrency,
+        'requests': len(texts),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'wall_seconds': wall,
+        'throughput_rps': len(latencies) / wall,
+        'characters_per_second': characters[0] / wall,
+        'audio_seconds': audio_seconds[0],
+        'real_time_factor': audio_seconds[0] / wall,
+        'latency_ms': {
+            'p50': float(np.percentile(latency_ms, 50)) if len(latency_ms) else None,
+            'p95': float(np.percentile(latency_ms, 95)) if len(latency_ms) else None,
+            'p99': float(np.percentile(latency_ms, 99)) if len(latency_ms) else None,
+            'mean': float(latency_ms.mean()) if len(latency_ms) else None,
+            'max': float(latency_ms.max()) if len(latency_ms) else None,
+        },
+    }
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_report(levels: List[Dict]):
+    print(f"{'conc':>5} {'reqs':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'chars/s':>9} {'RTF':>7}")
+    for level in levels:
+        latency = level['latency_ms']
+        print(f"{level['concurrency']:>5} {level['requests']:>5} {level['errors']:>4} "
+              f"{_format_ms(latency['p50'])} {_format_ms(latency['p95'])} {_format_ms(latency['p99'])} "
+              f"{level['throughput_rps']:8.2f} {level['characters_per_second']:9.0f} {level['real_time_factor']:7.2f}")
+
+
+def print_comparison(levels: List[Dict], baseline: Dict):
+    """Ratios against a previous run's JSON (for latency < 1 is better, for throughput > 1)."""
+    previous = {level['concurrency']: level for level in baseline['levels']}
+    print(f"\nvs {baseline['meta'].get('started_at', 'baseline')}:")
+    print(f"{'conc':>5} {'p50':>7} {'p95':>7} {'p99':>7} {'req/s':>7}")
+    for level in levels:
+        old = previous.get(level['concurrency'])
+        if old is None:
+            continue
+        ratios = []
+        for key in ('p50', 'p95', 'p99'):
+            new_value, old_value = level['latency_ms'][key], old['latency_ms'][key]
+            ratios.append(f"{new_value / old_value:7.2f}" if new_value and old_value else f"{'-':>7}")
+        throughput = level['throughput_rps'] / old['throughput_rps'] if old['throughput_rps'] else float('nan')
+        print(f"{level['concurrency']:>5} {' '.join(ratios)} {throughput:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Coqui TTS space")
+    parser.add_argument('--target', choices=['inproc', 'http'], default='inproc')
+    parser.add_argument('--url', default='http://localhost:7860', help="Server URL for --target http")
+    parser.add_argument('--endpoint', choices=['tts', 'chapter'], default='tts',
+                        help="HTTP endpoint for --target http: /v1/tts (raw PCM) or /v1/chapter (WAV)")
+    parser.add_argument('--backend', choices=['stub', 'torch'], default='stub',
+                        help="Model backend for --target inproc (stub needs no model download)")
+    parser.add_argument('--concurrency', default='1,2,4,8', help="Comma-separated concurrency levels")
+    parser.add_argument('--mix', choices=sorted(TEXT_MIXES), default='mixed', help="Text-length mix")
+    parser.add_argument('--requests', type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument('--warmup', type=int, default=2, help="Unrecorded requests sent before the first level")
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Write results JSON here")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    if args.target == 'inproc':
+        # Must be set before app/synthesis are imported; a private, memory-only cache per run
+        os.environ.setdefault('TTS_BACKEND', args.backend)
+        os.environ.setdefault('TTS_CACHE_DIR', tempfile.mkdtemp(prefix='tts_bench_'))
+        os.environ.setdefault('TTS_CACHE_DISK_MB', '0')
+        os.environ.setdefault('TTS_SENTENCE_CACHE_DISK_MB', '0')
+        target = InProcessTarget()
+    else:
+        target = HttpTarget(args.url, args.endpoint)
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(',')]
+    texts = make_texts(args.mix, args.warmup + args.requests * len(concurrency_levels), args.seed)
+    if args.warmup:
+        run_level(target, texts[:args.warmup], 1, args.speed)
+    texts = texts[args.warmup:]
+
+    meta = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'target': target.name,
+        'url': args.url if args.target == 'http' else None,
+        'endpoint': args.endpoint if args.target == 'http' else None,
+        'backend': os.environ.get('TTS_BACKEND') if args.target == 'inproc' else None,
+        'mix': args.mix,
+        'requests_per_level': args.requests,
+        'speed': args.speed,
+        'seed': args.seed,
+        'cpu_count': os.cpu_count(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'environment': {key: value for key, value in os.environ.items() if key.startswith('TTS_')},
+    }
+    levels = []
+    for index, concurrency in enumerate(concurrency_levels):
+        level_texts = texts[index * args.requests:(index + 1) * args.requests]
+        levels.append(run_level(target, level_texts, concurrency, args.speed))
+
+    print_report(levels)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(levels, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'levels': levels}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Stand-in for `TTS.api.TTS` with a fixed, tunable compute cost.
+
+Selected with `TTS_BACKEND=stub`, so the service and the load generator run
+on any Linux box without downloading a model. The stub burns CPU (numpy
+matrix products, which release the GIL like torch kernels do) for a base
+cost plus a per-character cost, then returns a tone whose length follows the
+text, roughly matching the speaking rate of the LJSpeech voices.
+"""
+
+import os
+import time
+
+import numpy as np
+
+# Tunables, read when the stub is created
+STUB_BASE_MS = float(os.environ.get("TTS_STUB_BASE_MS", "20"))
+STUB_MS_PER_CHAR = float(os.environ.get("TTS_STUB_MS_PER_CHAR", "0.5"))
+# Size reported to the model registry, as if the stub held real weights
+STUB_MEMORY_MB = int(os.environ.get("TTS_STUB_MEMORY_MB", "100"))
+STUB_SAMPLE_RATE = 22050
+# About 14 characters per second of speech
+STUB_SAMPLES_PER_CHAR = 1600
+
+
+class _StubSynthesizer:
+    """The attributes of `TTS.utils.synthesizer.Synthesizer` the space reads."""
+
+    def __init__(self, sample_rate: int):
+        self.output_sample_rate = sample_rate
+        # No vocoder: synthesis.supports_batched_forward() takes the per-passage path
+        self.vocoder_model = None
+
+
+class StubTTS:
+    """
+    Fake TTS model whose cost is base_ms + ms_per_char * len(text) of CPU time
+
+    Args:
+        base_ms: Fixed cost per call
+        ms_per_char: Additional cost per input character
+    """
+
+    def __init__(self, base_ms: float = STUB_BASE_MS, ms_per_char: float = STUB_MS_PER_CHAR):
+        self.base_ms = base_ms
+        self.ms_per_char = ms_per_char
+        self.synthesizer = _StubSynthesizer(STUB_SAMPLE_RATE)
+        self.memory_bytes = STUB_MEMORY_MB * 1024 * 1024
+        self._operand = np.random.default_rng(0).standard_normal((64, 64)).astype(np.float32)
+
+    def _burn(self, seconds: float):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            np.dot(self._operand, self._operand)
+
+    def tts(self, text: str, speed: float = 1.0, **kwargs) -> np.ndarray:
+        """Spend the configured compute time and return float32 audio for text."""
+        self._burn((self.base_ms + self.ms_per_char * len(text)) / 1000)
+        num_samples = int(len(text) * STUB_SAMPLES_PER_CHAR / speed)
+        t = np.arange(num_samples, dtype=np.float32) / STUB_SAMPLE_RATE
+        return 0.1 * np.sin(2 * np.pi * 220 * t)
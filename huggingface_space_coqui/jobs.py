@@ -0,0 +1,176 @@
+"""
+Background synthesis jobs.
+
+IReader knows which chapter comes next and can submit it ahead of time:
+jobs wait in a bounded priority queue, run on background threads, and keep
+their audio until fetched (finished jobs are retained up to a count and a
+byte limit, oldest dropped first).
+Submitting text that is already queued or running returns the existing job.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds max_queued jobs."""
+
+
+def _result_bytes(result: Any) -> int:
+    return getattr(result, 'nbytes', 0)
+
+
+@dataclass
+class Job:
+    id: str
+    text: str
+    speed: float
+    priority: int
+    model_name: Optional[str] = None
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Any = None
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status summary (without the audio)."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'model': self.model_name,
+            'characters': len(self.text),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """
+    Bounded priority queue of synthesis jobs served by background threads
+
+    Args:
+        run_fn: Called as run_fn(text, speed, model_name) on a background thread, returns the job result
+        max_queued: Max jobs waiting to run; further submissions raise JobQueueFull
+        num_threads: Jobs running at once
+        max_finished: Finished jobs kept for fetching before the oldest are dropped
+        max_finished_bytes: Total size of kept results (numpy arrays count their nbytes) before
+            the oldest are dropped; the newest finished job is always kept
+    """
+
+    def __init__(self, run_fn: Callable[[str, float, Optional[str]], Any], max_queued: int = 64, num_threads: int = 1,
+                 max_finished: int = 128, max_finished_bytes: int = 512 * 1024 * 1024):
+        self.run_fn = run_fn
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.max_finished_bytes = max_finished_bytes
+        self.finished_bytes = 0
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[tuple, Job] = {}
+        self._finished: "OrderedDict[str, Job]" = OrderedDict()
+
+        for index in range(max(1, num_threads)):
+            threading.Thread(target=self._run, name=f"tts-job-{index}", daemon=True).start()
+
+    def submit(self, text: str, speed: float, priority: int = 0, model_name: Optional[str] = None) -> Job:
+        """Queue a job. Higher priority runs first; equal priorities run in submission order."""
+        with self._lock:
+            existing = self._active.get((text, speed, model_name))
+            if existing is not None:
+                if priority > existing.priority and existing.status == QUEUED:
+                    # Re-queue with the higher priority; the stale heap entry is skipped when popped
+                    existing.priority = priority
+                    heapq.heappush(self._heap, (-priority, next(self._sequence), existing))
+                    self._not_empty.notify()
+                return existing
+            if self._qsize_locked() >= self.max_queued:
+                raise JobQueueFull(f"{self.max_queued} jobs already queued")
+
+            job = Job(id=uuid.uuid4().hex, text=text, speed=speed, priority=priority, model_name=model_name)
+            self._jobs[job.id] = job
+            self._active[(text, speed, model_name)] = job
+            heapq.heappush(self._heap, (-priority, next(self._sequence), job))
+            self._not_empty.notify()
+        logger.info(f"Queued job {job.id} ({len(text)} chars, priority {priority})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Wait up to timeout seconds for a job to finish, then return it (None if unknown)."""
+        job = self.get(job_id)
+        if job is not None:
+            job.finished.wait(timeout)
+        return job
+
+    def qsize(self) -> int:
+        """Number of jobs waiting to run."""
+        with self._lock:
+            return self._qsize_locked()
+
+    def _qsize_locked(self) -> int:
+        return sum(1 for job in self._active.values() if job.status == QUEUED)
+
+    def _next_job(self) -> Job:
+        with self._not_empty:
+            while True:
+                while not self._heap:
+                    self._not_empty.wait()
+                neg_priority, _, job = heapq.heappop(self._heap)
+                # Skip entries superseded by a priority bump or already picked up
+                if job.status == QUEUED and -neg_priority == job.priority:
+                    job.status = RUNNING
+                    job.started_at = time.time()
+                    return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            try:
+                result = self.run_fn(job.text, job.speed, job.model_name)
+                error = None
+            except Exception as e:
+                logger.error(f"❌ Job {job.id} failed: {e}")
+                result, error = None, str(e)
+
+            with self._lock:
+                job.result = result
+                job.error = error
+                job.status = FAILED if error else DONE
+                job.finished_at = time.time()
+                self._active.pop((job.text, job.speed, job.model_name), None)
+                self._finished[job.id] = job
+                self.finished_bytes += _result_bytes(result)
+                while len(self._finished) > self.max_finished or (
+                        self.finished_bytes > self.max_finished_bytes and len(self._finished) > 1):
+                    old_id, old_job = self._finished.popitem(last=False)
+                    self.finished_bytes -= _result_bytes(old_job.result)
+                    self._jobs.pop(old_id, None)
+            job.finished.set()
+            logger.info(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
@@ -0,0 +1,108 @@
+"""
+Registry of loaded TTS models with a memory budget.
+
+Models are loaded on first use and kept in LRU order together with an
+estimate of their resident size. When loading a model pushes the total past
+the budget, the least-recently-used models are dropped (pinned models, such
+as the default voice, are never evicted). Loading one model does not block
+requests for models that are already loaded.
+"""
+
+import gc
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Thread-safe lazy model cache bounded by a memory budget
+
+    Args:
+        loader: Called as loader(name) to load a model
+        size_fn: Returns the estimated resident bytes of a loaded model
+        memory_budget_bytes: Total estimated bytes of models kept loaded
+        pinned: Model names that are never evicted
+    """
+
+    def __init__(self, loader: Callable[[str], Any], size_fn: Callable[[Any], int], memory_budget_bytes: int,
+                 pinned: Iterable[str] = ()):
+        self.loader = loader
+        self.size_fn = size_fn
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pinned = set(pinned)
+
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it (and evicting others if over budget) on first use."""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only callers of the same model wait for its load
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    self._models.move_to_end(name)
+                    self.hits += 1
+                    return entry[0]
+
+            model = self.loader(name)
+            size = self.size_fn(model)
+            with self._lock:
+                self._models[name] = (model, size)
+                self._bytes += size
+                self.loads += 1
+                evicted = self._evict_locked(keep=name)
+            logger.info(f"Model {name} loaded (~{size / 1e6:.0f} MB, {self._bytes / 1e6:.0f} MB in use)")
+
+        if evicted:
+            logger.info(f"Evicted model(s) {', '.join(evicted)} to stay within {self.memory_budget_bytes / 1e6:.0f} MB")
+            # Drop the registry's references now; batches still running keep theirs until they finish
+            gc.collect()
+        return model
+
+    def _evict_locked(self, keep: str):
+        evicted = []
+        for name in list(self._models):
+            if self._bytes <= self.memory_budget_bytes:
+                break
+            if name == keep or name in self.pinned:
+                continue
+            _, size = self._models.pop(name)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append(name)
+        return evicted
+
+    def loaded(self) -> Dict[str, int]:
+        """Loaded model names (least recently used first) with their estimated bytes."""
+        with self._lock:
+            return {name: size for name, (_, size) in self._models.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'memory_bytes': self._bytes,
+                'loaded': {name: size for name, (_, size) in self._models.items()},
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,255 @@
+"""
+Optimized CPU inference for loaded Coqui models.
+
+Selected with TTS_BACKEND (comma-separated, e.g. "onnx,int8") and applied
+by synthesis.load_model after the PyTorch model is loaded:
+
+- onnx: the vocoder generator, which does most of the CPU work, is exported
+  to ONNX and run by ONNX Runtime (requires the optional `onnxruntime` package)
+- int8: Linear/LSTM layers of the acoustic model get dynamically quantized
+  int8 weights. A large win for Tacotron2's recurrent decoder; FastPitch is
+  convolutions and attention, which dynamic quantization leaves alone, so
+  for it this is skipped with a warning.
+
+Every replacement is checked against the PyTorch module it replaces on a few
+reference sentences. If the signal-to-noise ratio falls below
+TTS_BACKEND_MIN_SNR_DB, the PyTorch module is kept and a warning is logged.
+
+Run `python optimized_backend.py --model NAME --backend onnx,int8` to print
+the accuracy and real-time factor of both paths side by side.
+"""
+
+import copy
+import inspect
+import io
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Optimizations accepted in TTS_BACKEND besides "torch" (no-op) and "stub"
+OPTIMIZATIONS = ('onnx', 'int8')
+
+# Below this SNR against the PyTorch output an optimization is rejected
+MIN_SNR_DB = float(os.environ.get("TTS_BACKEND_MIN_SNR_DB", "25"))
+
+ACCURACY_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "He turned toward the mountain gate, and the elders fell silent.",
+    "Is this really the end?",
+]
+
+
+def snr_db(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Signal-to-noise ratio of candidate against reference over their common length, in dB."""
+    length = min(reference.size, candidate.size)
+    reference = reference.reshape(-1)[:length].astype(np.float64)
+    noise = reference - candidate.reshape(-1)[:length]
+    noise_power = float(np.sum(noise * noise))
+    if noise_power == 0.0:
+        return math.inf
+    return 10 * math.log10(max(float(np.sum(reference * reference)), 1e-20) / noise_power)
+
+
+@torch.inference_mode()
+def _acoustic_outputs(model, sentences: Sequence[str]) -> List[torch.Tensor]:
+    """Acoustic model outputs ([1, T, C] mels) for sentences."""
+    device = next(model.parameters()).device
+    outputs = []
+    for sentence in sentences:
+        token_ids = torch.as_tensor([model.tokenizer.text_to_ids(sentence)], dtype=torch.long, device=device)
+        outputs.append(model.inference(token_ids)["model_outputs"].cpu())
+    return outputs
+
+
+class _GeneratorInference(torch.nn.Module):
+    """Exports the generator's inference() (including its replicate padding) as forward()."""
+
+    def __init__(self, generator: torch.nn.Module):
+        super().__init__()
+        self.generator = generator
+
+    def forward(self, mel):
+        return self.generator.inference(mel)
+
+
+class OnnxVocoder(torch.nn.Module):
+    """
+    Drop-in replacement for a Coqui vocoder that runs an exported ONNX graph
+
+    Only `inference()` is provided, which is all the synthesizer calls.
+
+    Args:
+        model_bytes: Serialized ONNX model of the generator's inference pass
+        num_threads: ONNX Runtime intra-op threads (0 = its own default)
+    """
+
+    def __init__(self, model_bytes: bytes, num_threads: int = 0):
+        super().__init__()
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_bytes, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        # Counted by synthesis.estimate_model_bytes; the weights make up almost all of the graph
+        self.weight_bytes = len(model_bytes)
+        # Callers look up the vocoder device through its first parameter
+        self.device_anchor = torch.nn.Parameter(torch.empty(0), requires_grad=False)
+
+    def inference(self, mel: torch.Tensor) -> torch.Tensor:
+        mel = mel.detach().cpu().numpy().astype(np.float32, copy=False)
+        (waveform,) = self.session.run(None, {self.input_name: mel})
+        return torch.from_numpy(waveform)
+
+
+def export_vocoder(vocoder_model: torch.nn.Module) -> bytes:
+    """Export a Coqui GAN vocoder's generator to ONNX with dynamic batch and length axes."""
+    generator = getattr(vocoder_model, 'model_g', vocoder_model)
+    example = torch.randn(1, generator.conv_pre.in_channels, 64)
+    buffer = io.BytesIO()
+    # Newer torch defaults to the dynamo exporter; older releases don't know the keyword
+    extra = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            _GeneratorInference(generator).eval(),
+            (example,),
+            buffer,
+            input_names=['mel'],
+            output_names=['waveform'],
+            dynamic_axes={'mel': {0: 'batch', 2: 'frames'}, 'waveform': {0: 'batch', 2: 'samples'}},
+            opset_version=17,
+            **extra,
+        )
+    return buffer.getvalue()
+
+
+def apply_onnx_vocoder(tts, min_snr_db: float = MIN_SNR_DB) -> bool:
+    """Swap the vocoder for an ONNX Runtime session if its output matches. Returns whether it was swapped."""
+    synthesizer = tts.synthesizer
+    if synthesizer.vocoder_model is None:
+        logger.warning("onnx backend: model has no neural vocoder, keeping PyTorch")
+        return False
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        logger.warning("onnx backend: onnxruntime is not installed, keeping PyTorch")
+        return False
+
+    start_time = time.perf_counter()
+    try:
+        candidate = OnnxVocoder(export_vocoder(synthesizer.vocoder_model), torch.get_num_threads())
+        scores = []
+        with torch.inference_mode():
+            for mel in _acoustic_outputs(synthesizer.tts_model, ACCURACY_SENTENCES):
+                vocoder_input = mel.transpose(1, 2).contiguous()
+                scores.append(snr_db(synthesizer.vocoder_model.inference(vocoder_input).numpy(),
+                                     candidate.inference(vocoder_input).numpy()))
+    except Exception as e:
+        # Unsupported ops, exporter or runtime version mismatches: an optimization must never stop startup
+        logger.warning(f"onnx backend: export or session setup failed ({type(e).__name__}: {e}), keeping PyTorch")
+        return False
+    if min(scores) < min_snr_db:
+        logger.warning(f"onnx backend: vocoder SNR {min(scores):.1f} dB below {min_snr_db} dB, keeping PyTorch")
+        return False
+    synthesizer.vocoder_model = candidate
+    logger.info(f"⚡ ONNX Runtime vocoder ready in {time.perf_counter() - start_time:.1f}s "
+                f"(min SNR vs PyTorch {min(scores):.1f} dB)")
+    return True
+
+
+def apply_int8_quantization(tts, min_snr_db: float = MIN_SNR_DB) -> bool:
+    """Dynamically quantize the acoustic model to int8 if its output matches. Returns whether it was swapped."""
+    synthesizer = tts.synthesizer
+    model = synthesizer.tts_model
+    start_time = time.perf_counter()
+    try:
+        quantized = torch.ao.quantization.quantize_dynamic(
+            copy.deepcopy(model),
+            {torch.nn.Linear, torch.nn.LSTM, torch.nn.LSTMCell, torch.nn.GRU},
+            dtype=torch.qint8
+        )
+    except Exception as e:
+        logger.warning(f"int8 backend: quantization failed ({type(e).__name__}: {e}), keeping float32")
+        return False
+    num_quantized = sum(1 for module in quantized.modules() if type(module).__module__.startswith('torch.ao.nn.quantized'))
+    if num_quantized == 0:
+        logger.warning("int8 backend: acoustic model has no Linear/LSTM layers to quantize, keeping float32")
+        return False
+
+    scores = []
+    try:
+        for reference, candidate in zip(_acoustic_outputs(model, ACCURACY_SENTENCES),
+                                        _acoustic_outputs(quantized, ACCURACY_SENTENCES)):
+            # Durations may round differently; a large length change counts as a mismatch
+            if abs(reference.shape[1] - candidate.shape[1]) > 0.1 * reference.shape[1]:
+                scores.append(-math.inf)
+            else:
+                scores.append(snr_db(reference.numpy(), candidate.numpy()))
+    except Exception as e:
+        # Quantized kernels missing for this CPU/backend only show up when the model runs
+        logger.warning(f"int8 backend: quantized model failed to run ({type(e).__name__}: {e}), keeping float32")
+        return False
+    if min(scores) < min_snr_db:
+        logger.warning(f"int8 backend: acoustic model SNR {min(scores):.1f} dB below {min_snr_db} dB, keeping float32")
+        return False
+    synthesizer.tts_model = quantized
+    logger.info(f"⚡ int8 acoustic model ready in {time.perf_counter() - start_time:.1f}s "
+                f"({num_quantized} layers quantized, min SNR vs PyTorch {min(scores):.1f} dB)")
+    return True
+
+
+def optimize(tts, optimizations: Sequence[str], min_snr_db: float = MIN_SNR_DB) -> Dict[str, bool]:
+    """Apply the named optimizations in order; returns which ones were applied."""
+    unknown = [name for name in optimizations if name not in OPTIMIZATIONS]
+    if unknown:
+        raise ValueError(f"Unknown TTS backend(s) {unknown}, expected any of {list(OPTIMIZATIONS)}")
+    appliers = {'onnx': apply_onnx_vocoder, 'int8': apply_int8_quantization}
+    return {name: appliers[name](tts, min_snr_db) for name in optimizations}
+
+
+def _time_synthesis(tts, sentences: Sequence[str], repeats: int):
+    """Waveforms for sentences, and the real-time factor (wall seconds per audio second)."""
+    waveforms = [np.asarray(tts.tts(text=sentence), dtype=np.float32) for sentence in sentences]
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for sentence in sentences:
+            tts.tts(text=sentence)
+    elapsed = time.perf_counter() - start_time
+    audio_seconds = repeats * sum(len(wav) for wav in waveforms) / tts.synthesizer.output_sample_rate
+    return waveforms, elapsed / audio_seconds
+
+
+def main():
+    import argparse
+
+    from TTS.api import TTS
+
+    parser = argparse.ArgumentParser(description="Compare an optimized backend against PyTorch")
+    parser.add_argument('--model', default="tts_models/en/ljspeech/fast_pitch")
+    parser.add_argument('--backend', default="onnx,int8", help="Comma-separated optimizations")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    tts = TTS(args.model)
+    reference, reference_rtf = _time_synthesis(tts, ACCURACY_SENTENCES, args.repeats)
+    applied = optimize(tts, [name for name in args.backend.split(',') if name], min_snr_db=-math.inf)
+    optimized, optimized_rtf = _time_synthesis(tts, ACCURACY_SENTENCES, args.repeats)
+
+    print(f"Applied: {applied}")
+    for sentence, ref, opt in zip(ACCURACY_SENTENCES, reference, optimized):
+        print(f"  SNR {snr_db(ref, opt):6.1f} dB, length {len(ref)} -> {len(opt)}: {sentence}")
+    print(f"RTF (lower is faster): torch {reference_rtf:.3f}, optimized {optimized_rtf:.3f} "
+          f"({reference_rtf / optimized_rtf:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Memo cache for the text front end of Coqui models.
+
+For every sentence it synthesizes, Coqui cleans the text (abbreviations,
+numbers, ...) and, for phoneme models, runs the phonemizer on every
+punctuation-delimited clause - one espeak subprocess per clause. Novels
+repeat the same sentences and short clauses ("he said", "Yes.", character
+names) constantly, so both steps are memoized:
+
+- sentences: the token ids `tokenizer.text_to_ids()` returns for a sentence
+- clauses: the phonemizer backend's output for a single clause
+
+Both levels are exact (the same calls the model would make, with the same
+arguments) and bounded by entry count in LRU order. With
+TTS_PHONEME_CACHE_MODE=words, every phonemized clause also seeds a word
+cache (the clause output split into words, so the phonemes come from real
+context), and later clauses made only of known words are assembled without
+calling the phonemizer. That saves far more on fresh chapters, but a
+heteronym ("read", "live") keeps the pronunciation it was first seen with.
+
+`install()` is called by synthesis.load_model, so worker processes get
+their own cache as well.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entries per level (sentences, clauses); 0 disables the cache
+PHONEME_CACHE_ENTRIES = int(os.environ.get("TTS_PHONEME_CACHE_ENTRIES", "20000"))
+# "exact" = sentences and clauses only, "words" = also assemble clauses from cached words
+PHONEME_CACHE_MODE = os.environ.get("TTS_PHONEME_CACHE_MODE", "exact")
+
+
+class MemoLRU:
+    """
+    Thread-safe memo of a function's results, bounded by entry count
+
+    Misses are computed outside the lock; the time they take is recorded so
+    the time saved by hits can be estimated.
+
+    Args:
+        max_entries: Max results kept; the least recently used are dropped
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.miss_seconds = 0.0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the memoized result for key, calling compute() on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        start_time = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start_time
+        with self._lock:
+            self.misses += 1
+            self.miss_seconds += elapsed
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_all(self, keys: Sequence[Hashable]) -> Optional[List[Any]]:
+        """Results for all keys (counted as one hit), or None if any is missing (one miss)."""
+        with self._lock:
+            if not all(key in self._entries for key in keys):
+                self.misses += 1
+                return None
+            self.hits += 1
+            for key in keys:
+                self._entries.move_to_end(key)
+            return [self._entries[key] for key in keys]
+
+    def put_all(self, items: Iterable[Tuple[Hashable, Any]], seconds: float = 0.0):
+        """Store results computed together, taking `seconds` in total."""
+        with self._lock:
+            self.miss_seconds += seconds
+            for key, value in items:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            seconds_per_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'miss_seconds': self.miss_seconds,
+                # What the hits would have cost at the average miss time
+                'saved_seconds_estimate': self.hits * seconds_per_miss,
+            }
+
+
+class PhonemeCache:
+    """
+    Sentence-, clause- and optionally word-level front-end memo shared by the models of a process
+
+    Keys include the model name, since cleaners and phonemizers differ per model.
+
+    Args:
+        max_entries: Max entries per level
+        mode: "exact", or "words" to also assemble clauses from cached words
+    """
+
+    def __init__(self, max_entries: int = PHONEME_CACHE_ENTRIES, mode: str = PHONEME_CACHE_MODE):
+        if mode not in ('exact', 'words'):
+            raise ValueError(f"Unknown phoneme cache mode {mode!r}, expected 'exact' or 'words'")
+        self.mode = mode
+        self.sentences = MemoLRU(max_entries)
+        self.clauses = MemoLRU(max_entries)
+        # Hits/misses count clauses; entries are words
+        self.words = MemoLRU(max_entries)
+
+    def install(self, tts, model_name: str) -> bool:
+        """Memoize the front end of a loaded model in place. Returns False if the model has no tokenizer."""
+        model = getattr(getattr(tts, 'synthesizer', None), 'tts_model', None)
+        tokenizer = getattr(model, 'tokenizer', None)
+        if tokenizer is None or self.sentences.max_entries <= 0:
+            return False
+
+        text_to_ids = tokenizer.text_to_ids
+
+        def cached_text_to_ids(text, language=None):
+            # Callers turn the ids into tensors; hand out a fresh list so the cached entry stays intact
+            return list(self.sentences.get((model_name, language, text),
+                                           lambda: tuple(text_to_ids(text, language=language))))
+
+        tokenizer.text_to_ids = cached_text_to_ids
+
+        # MultiPhonemizer keeps one phonemizer per language
+        phonemizer = getattr(tokenizer, 'phonemizer', None) if getattr(tokenizer, 'use_phonemes', False) else None
+        backends = getattr(phonemizer, 'lang_to_phonemizer', {phonemizer.language if phonemizer else None: phonemizer})
+        for language, backend in backends.items():
+            if backend is not None and hasattr(backend, '_phonemize'):
+                self._wrap_phonemizer(backend, model_name, language)
+        logger.info(f"Front-end cache installed for {model_name} "
+                    f"({self.mode}, {self.sentences.max_entries} entries per level)")
+        return True
+
+    def _wrap_phonemizer(self, backend, model_name: str, language: str):
+        phonemize = backend._phonemize
+
+        def cached_phonemize(text, separator=None):
+            key = (model_name, language, separator)
+            if self.mode != 'words':
+                return self.clauses.get(key + (text,), lambda: phonemize(text, separator))
+
+            word_keys = [key + (word,) for word in text.split()]
+            if word_keys:
+                phonemes = self.words.get_all(word_keys)
+                if phonemes is not None:
+                    return ' '.join(phonemes)
+            start_time = time.perf_counter()
+            phonemized = self.clauses.get(key + (text,), lambda: phonemize(text, separator))
+            # Only seed words when the output lines up one word per input word
+            words = phonemized.split()
+            if word_keys and len(words) == len(word_keys):
+                self.words.put_all(zip(word_keys, words), time.perf_counter() - start_time)
+            return phonemized
+
+        backend._phonemize = cached_phonemize
+
+    def clear(self):
+        self.sentences.clear()
+        self.clauses.clear()
+        self.words.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {'sentences': self.sentences.stats(), 'clauses': self.clauses.stats()}
+        if self.mode == 'words':
+            stats['words'] = self.words.stats()
+        return stats
+
+
+def combine_stats(stats: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum PhonemeCache.stats() of several processes (e.g. the synthesis workers)."""
+    combined = {}
+    for process_stats in stats:
+        for level, level_stats in process_stats.items():
+            total = combined.setdefault(level, dict.fromkeys(level_stats, 0))
+            for name, value in level_stats.items():
+                total[name] += value
+    for total in combined.values():
+        lookups = total['hits'] + total['misses']
+        total['hit_ratio'] = total['hits'] / lookups if lookups else 0.0
+    return combined
+
+
+# One cache per process, installed into every model synthesis.load_model loads
+PHONEME_CACHE = PhonemeCache()
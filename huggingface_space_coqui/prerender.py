@@ -0,0 +1,320 @@
+"""
+Offline audiobook pre-render.
+
+Renders every "Chapter NNN - Title.txt" file of a book directory (the
+test_local_novel/ layout) to one compressed audio file per chapter, plus a
+manifest.json describing them. Sentences are synthesized across a pool of
+worker processes (the same SynthesisWorkerPool the server uses) while
+earlier chapters are encoded and written, so all cores stay busy.
+
+Rendering is resumable: each manifest entry records a hash of the chapter
+text and the render settings, and chapters whose hash still matches (and
+whose audio file is present) are skipped. The manifest is rewritten after
+every chapter, so an interrupted run loses at most the chapters in flight.
+
+Usage (from huggingface_space_coqui/):
+    python prerender.py ../test_local_novel --output /data/audiobooks/local_novel --format ogg --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from audio_cache import AudioCache, make_cache_key
+from audio_utils import MEDIA_TYPES, encode_audio, time_stretch
+from synthesis import MAX_FORWARD_SENTENCES, SENTENCE_PAUSE_SAMPLES
+from text_processing import normalize_sentence, normalize_text, split_sentences
+from worker_pool import SynthesisWorkerPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "tts_models/en/ljspeech/fast_pitch"
+CHAPTER_FILE = re.compile(r'^Chapter (\d+) - (.+)\.txt$')
+MANIFEST_NAME = 'manifest.json'
+# Bumped whenever rendering changes in a way that should invalidate existing files
+RENDER_VERSION = 1
+
+SILENT_PAUSE = np.zeros(SENTENCE_PAUSE_SAMPLES, dtype=np.int16)
+
+
+@dataclass
+class ChapterFile:
+    number: int
+    title: str
+    path: Path
+
+
+def find_chapters(book_dir: Path) -> List[ChapterFile]:
+    """Chapter files of a book directory, in chapter order."""
+    chapters = []
+    for path in book_dir.iterdir():
+        match = CHAPTER_FILE.match(path.name)
+        if match and path.is_file():
+            chapters.append(ChapterFile(int(match.group(1)), match.group(2), path))
+    return sorted(chapters, key=lambda chapter: chapter.number)
+
+
+def content_hash(text: str, settings: Dict) -> str:
+    """Hash of a chapter's text and everything that affects its rendered audio."""
+    payload = json.dumps(dict(settings, version=RENDER_VERSION), sort_keys=True) + '\x00' + text
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write via a temporary file and rename, so a crash never leaves a truncated file behind."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _InProcessPool:
+    """SynthesisWorkerPool stand-in that synthesizes on one thread of this process (--workers 0)."""
+
+    def __init__(self, model_name: str):
+        from synthesis import load_model, synthesize_requests
+
+        self._synthesize_requests = synthesize_requests
+        self.tts = load_model(model_name)
+        self.sample_rate = self.tts.synthesizer.output_sample_rate
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-prerender")
+
+    def submit(self, requests: Sequence[Tuple[str, float]]) -> Future:
+        return self._executor.submit(self._synthesize_requests, self.tts, list(requests))
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+@dataclass
+class _ChapterRender:
+    chapter: ChapterFile
+    text: str
+    content_hash: str
+    # Per sentence: cached audio, or (cache key, future, index in the future's batch)
+    parts: list = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+
+class BookRenderer:
+    """
+    Pipelines chapters through a synthesis pool and writes audio plus manifest
+
+    Args:
+        output_dir: Where audio files and manifest.json go
+        settings: Render settings (model, speed, format, speed_mode); part of every content hash
+        max_chapters_in_flight: Chapters submitted ahead of the one being written
+        sentence_cache_mb: Memory for sentence audio reused across chapters
+    """
+
+    def __init__(self, output_dir: Path, settings: Dict, max_chapters_in_flight: int, sentence_cache_mb: int = 256):
+        self.output_dir = output_dir
+        self.settings = settings
+        self.max_chapters_in_flight = max(1, max_chapters_in_flight)
+        self.sentence_cache = AudioCache(memory_budget_bytes=sentence_cache_mb * 1024 * 1024)
+        self.model_speed = 1.0 if settings['speed_mode'] == 'stretch' else settings['speed']
+        # Sentences submitted but not yet written, so chapters in flight share them
+        self._submitted: Dict[str, Tuple[Future, int]] = {}
+
+        self.manifest_path = output_dir / MANIFEST_NAME
+        self.entries: Dict[str, Dict] = {}
+        self._pool = None
+
+    def plan(self, chapters: Sequence[ChapterFile], force: bool = False) -> List[Tuple[ChapterFile, str, str]]:
+        """(chapter, text, hash) of chapters that need rendering; up-to-date entries are kept."""
+        previous = {entry['source']: entry for entry in load_manifest(self.manifest_path).get('chapters', [])}
+        todo = []
+        for chapter in chapters:
+            text = normalize_text(chapter.path.read_text(encoding='utf-8'))
+            if not text:
+                logger.warning(f"Skipping empty chapter {chapter.path.name}")
+                continue
+            digest = content_hash(text, self.settings)
+            entry = previous.get(chapter.path.name)
+            if (not force and entry is not None and entry.get('content_hash') == digest
+                    and (self.output_dir / entry['audio']).exists()):
+                self.entries[chapter.path.name] = entry
+            else:
+                todo.append((chapter, text, digest))
+        return todo
+
+    def _submit_chapter(self, chapter: ChapterFile, text: str, digest: str) -> _ChapterRender:
+        render = _ChapterRender(chapter, text, digest)
+        batch = []
+        queued = set()
+        for sentence in split_sentences(text):
+            normalized = normalize_sentence(sentence)
+            if not normalized:
+                render.parts.append(SILENT_PAUSE)
+                continue
+            cache_key = make_cache_key(self.settings['model'], normalized, self.model_speed)
+            cached = self.sentence_cache.get(cache_key)
+            if cached is not None:
+                render.parts.append(cached)
+                continue
+            if cache_key not in self._submitted and cache_key not in queued:
+                queued.add(cache_key)
+                batch.append((cache_key, normalized))
+                if len(batch) == MAX_FORWARD_SENTENCES:
+                    self._submit_batch(batch)
+                    batch = []
+            render.parts.append(cache_key)
+        if batch:
+            self._submit_batch(batch)
+        render.parts = [(part, *self._submitted[part]) if isinstance(part, str) else part for part in render.parts]
+        return render
+
+    def _submit_batch(self, batch: List[Tuple[str, str]]):
+        future = self._pool.submit([(normalized, self.model_speed) for _, normalized in batch])
+        for index, (cache_key, _) in enumerate(batch):
+            self._submitted[cache_key] = (future, index)
+
+    def _finish_chapter(self, render: _ChapterRender, sample_rate: int) -> Dict:
+        speed = self.settings['speed']
+        parts = []
+        for part in render.parts:
+            if isinstance(part, tuple):
+                cache_key, future, index = part
+                wav = future.result()[index]
+                self.sentence_cache.put(cache_key, wav)
+                self._submitted.pop(cache_key, None)
+            else:
+                wav = part
+            parts.append(wav if speed == self.model_speed else time_stretch(wav, speed / self.model_speed))
+        audio = np.concatenate(parts)
+
+        fmt = self.settings['format']
+        data = encode_audio(audio, sample_rate, fmt)
+        audio_name = f"{render.chapter.path.stem}.{fmt}"
+        _write_atomic(self.output_dir / audio_name, data)
+        return {
+            'number': render.chapter.number,
+            'title': render.chapter.title,
+            'source': render.chapter.path.name,
+            'audio': audio_name,
+            'content_hash': render.content_hash,
+            'characters': len(render.text),
+            'duration_seconds': round(len(audio) / sample_rate, 3),
+            'bytes': len(data),
+            'render_seconds': round(time.perf_counter() - render.started_at, 3),
+        }
+
+    def write_manifest(self, chapters: Sequence[ChapterFile], sample_rate: int):
+        manifest = dict(self.settings, sample_rate=sample_rate,
+                        chapters=[self.entries[c.path.name] for c in chapters if c.path.name in self.entries])
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode('utf-8'))
+
+    def render(self, pool, chapters: Sequence[ChapterFile], todo: Sequence[Tuple[ChapterFile, str, str]]) -> float:
+        """
+        Render the planned chapters in order
+
+        Args:
+            pool: SynthesisWorkerPool (or _InProcessPool) with the model loaded
+            chapters: All chapters of the book, for the manifest
+            todo: Chapters to render, from plan()
+
+        Returns:
+            Seconds of audio written
+        """
+        self._pool = pool
+        sample_rate = pool.sample_rate
+        waiting = deque(todo)
+        in_flight = deque()
+        audio_seconds = 0.0
+        done = 0
+        while waiting or in_flight:
+            while waiting and len(in_flight) < self.max_chapters_in_flight:
+                in_flight.append(self._submit_chapter(*waiting.popleft()))
+            render = in_flight.popleft()
+            entry = self._finish_chapter(render, sample_rate)
+            self.entries[entry['source']] = entry
+            self.write_manifest(chapters, sample_rate)
+            done += 1
+            audio_seconds += entry['duration_seconds']
+            logger.info(f"✅ [{done}/{len(todo)}] {entry['audio']}: {entry['duration_seconds'] / 60:.1f} min of audio, "
+                        f"{entry['bytes'] / 1e6:.1f} MB, {entry['render_seconds']:.1f}s")
+        return audio_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render a book's chapters to compressed audio")
+    parser.add_argument('book_dir', help="Directory with 'Chapter NNN - Title.txt' files")
+    parser.add_argument('--output', help="Output directory (default: BOOK_DIR/audio)")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--format', choices=sorted(MEDIA_TYPES), default='ogg')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Synthesis worker processes (0 = synthesize in this process)")
+    parser.add_argument('--torch-threads', type=int, default=0,
+                        help="Torch threads per worker (0 = split the CPU cores evenly)")
+    parser.add_argument('--chapters-in-flight', type=int, default=0,
+                        help="Chapters submitted ahead of the one being written (default: 2 per worker)")
+    parser.add_argument('--sentence-cache-mb', type=int, default=256,
+                        help="Memory for sentence audio reused across chapters")
+    parser.add_argument('--force', action='store_true', help="Re-render chapters even if they are up to date")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    book_dir = Path(args.book_dir)
+    output_dir = Path(args.output) if args.output else book_dir / 'audio'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    chapters = find_chapters(book_dir)
+    if not chapters:
+        parser.error(f"No 'Chapter NNN - Title.txt' files in {book_dir}")
+
+    settings = {
+        'model': args.model,
+        'speed': max(0.5, min(2.0, args.speed)),
+        'format': args.format,
+        'speed_mode': os.environ.get("TTS_SPEED_MODE", "stretch"),
+    }
+    renderer = BookRenderer(output_dir, settings, args.chapters_in_flight or 2 * max(1, args.workers),
+                            args.sentence_cache_mb)
+    todo = renderer.plan(chapters, force=args.force)
+    logger.info(f"{len(chapters)} chapters, {len(chapters) - len(todo)} up to date, {len(todo)} to render")
+    if not todo:
+        return
+
+    start_time = time.perf_counter()
+    if args.workers > 0:
+        pool = SynthesisWorkerPool(args.model, args.workers, args.torch_threads)
+        pool.wait_ready()
+    else:
+        pool = _InProcessPool(args.model)
+    logger.info(f"Model ready in {time.perf_counter() - start_time:.1f}s")
+
+    render_start = time.perf_counter()
+    try:
+        audio_seconds = renderer.render(pool, chapters, todo)
+    finally:
+        pool.shutdown()
+    elapsed = time.perf_counter() - render_start
+    logger.info(f"✅ Rendered {len(todo)} chapters ({audio_seconds / 3600:.2f} h of audio) in {elapsed:.0f}s, "
+                f"{audio_seconds / max(elapsed, 1e-9):.1f}x real time. Manifest: {renderer.manifest_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Model-level synthesis helpers for the Coqui TTS space.
+
+Everything here works on a loaded `TTS.api.TTS` object and has no Gradio
+dependency. For single-speaker models with a neural vocoder the sentences
+of a whole micro-batch share one padded vocoder forward pass; other models
+fall back to one `tts.tts()` call per passage.
+"""
+
+import itertools
+import logging
+import os
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from audio_utils import to_int16
+from phoneme_cache import PHONEME_CACHE
+from text_processing import split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Silence appended after every sentence, same as TTS.utils.synthesizer.Synthesizer.tts
+SENTENCE_PAUSE_SAMPLES = 10000
+
+# Upper bound on sentences padded into one vocoder pass
+MAX_FORWARD_SENTENCES = 16
+
+
+# "torch" = stock Coqui inference, "stub" = benchmark.stub_backend (no model download),
+# or optimized_backend.OPTIMIZATIONS applied on top of torch, comma-separated (e.g. "onnx,int8")
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "torch")
+
+
+def load_model(model_name: str):
+    """Load a Coqui model by name (downloaded on first use)."""
+    if TTS_BACKEND == "stub":
+        from benchmark.stub_backend import StubTTS
+
+        logger.info(f"Using stub backend instead of {model_name}")
+        return StubTTS()
+
+    from TTS.api import TTS
+
+    start_time = time.perf_counter()
+    tts = TTS(model_name)
+    logger.info(f"Loaded {model_name} in {time.perf_counter() - start_time:.1f}s")
+
+    optimizations = [name.strip() for name in TTS_BACKEND.split(",") if name.strip() not in ("", "torch")]
+    if optimizations:
+        from optimized_backend import optimize
+
+        optimize(tts, optimizations)
+    PHONEME_CACHE.install(tts, model_name)
+    return tts
+
+
+def estimate_model_bytes(tts) -> int:
+    """Approximate resident size of a loaded model: parameters and buffers of its torch modules."""
+    if hasattr(tts, 'memory_bytes'):
+        return tts.memory_bytes
+    synthesizer = getattr(tts, 'synthesizer', None)
+    total = 0
+    for module in (getattr(synthesizer, 'tts_model', None), getattr(synthesizer, 'vocoder_model', None)):
+        if isinstance(module, torch.nn.Module):
+            for tensor in itertools.chain(module.parameters(), module.buffers()):
+                total += tensor.numel() * tensor.element_size()
+            # Weights held outside torch (ONNX Runtime vocoder)
+            total += getattr(module, 'weight_bytes', 0)
+    return total
+
+
+def supports_batched_forward(tts) -> bool:
+    """Whether the loaded model's sentences can share a batched vocoder pass."""
+    synthesizer = getattr(tts, 'synthesizer', None)
+    if synthesizer is None or synthesizer.vocoder_model is None:
+        return False
+    model = synthesizer.tts_model
+    # Multi-speaker/multi-lingual models need per-sentence conditioning we don't thread through here
+    if getattr(synthesizer, 'tts_speakers_file', None) or getattr(synthesizer, 'tts_languages_file', None):
+        return False
+    if getattr(model, 'speaker_manager', None) is not None or getattr(model, 'language_manager', None) is not None:
+        return False
+    # Resampling the mel between acoustic model and vocoder is only done one sentence at a time
+    return synthesizer.vocoder_config.audio['sample_rate'] == model.ap.sample_rate
+
+
+@torch.inference_mode()
+def _forward_sentences(tts, sentences: Sequence[str]) -> List[np.ndarray]:
+    """
+    Synthesize sentences with one shared vocoder pass
+
+    The acoustic model runs per sentence: its feed-forward convolutions are not
+    masked, so padding would leak into neighbouring frames. It is cheap next to
+    the vocoder, which is purely convolutional and does most of the CPU work, so
+    the mels are padded into a single [B, C, T] vocoder batch.
+    """
+    synthesizer = tts.synthesizer
+    model = synthesizer.tts_model
+    device = next(model.parameters()).device
+
+    vocoder_inputs = []
+    for sentence in sentences:
+        token_ids = torch.as_tensor([model.tokenizer.text_to_ids(sentence)], dtype=torch.long, device=device)
+        mel = model.inference(token_ids)["model_outputs"][0].cpu().numpy()
+        # Same renormalization as Synthesizer.tts: TTS audio config -> vocoder audio config
+        mel = model.ap.denormalize(mel.T).T
+        vocoder_inputs.append(synthesizer.vocoder_ap.normalize(mel.T))
+
+    # Edge padding repeats the last frame, like the vocoder's own "replicate" inference padding
+    frame_counts = [mel.shape[1] for mel in vocoder_inputs]
+    max_frames = max(frame_counts)
+    batch = np.stack([np.pad(mel, ((0, 0), (0, max_frames - mel.shape[1])), mode='edge') for mel in vocoder_inputs])
+    vocoder_device = next(synthesizer.vocoder_model.parameters()).device
+    waveforms = synthesizer.vocoder_model.inference(torch.as_tensor(batch, dtype=torch.float32, device=vocoder_device))
+
+    # The vocoder pads its input on both sides (HiFiGAN: 5 frames); keep that margin for every row
+    hop_length = synthesizer.vocoder_config.audio['hop_length']
+    margin = waveforms.shape[-1] - max_frames * hop_length
+    trim = "do_trim_silence" in synthesizer.tts_config.audio and synthesizer.tts_config.audio["do_trim_silence"]
+    wavs = []
+    for row, frames in enumerate(frame_counts):
+        wav = waveforms[row, 0, :frames * hop_length + margin].cpu().numpy().astype(np.float32, copy=False)
+        if trim:
+            wav = wav[:model.ap.find_endpoint(wav)]
+        wavs.append(wav)
+    return wavs
+
+
+def synthesize_batch(tts, texts: Sequence[str], speed: float = 1.0) -> List[np.ndarray]:
+    """
+    Synthesize several passages together
+
+    All sentences of all passages are sorted by length (to keep padding small)
+    and vocoded in padded batches of up to MAX_FORWARD_SENTENCES.
+
+    Returns:
+        One int16 PCM waveform per input text, in input order
+    """
+    if not supports_batched_forward(tts):
+        return [to_int16(tts.tts(text=text, speed=speed)) for text in texts]
+
+    sentences = [(text_index, sentence)
+                 for text_index, text in enumerate(texts)
+                 for sentence in split_sentences(text)]
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i][1]))
+    sentence_wavs = [None] * len(sentences)
+    for start in range(0, len(order), MAX_FORWARD_SENTENCES):
+        chunk = order[start:start + MAX_FORWARD_SENTENCES]
+        for i, wav in zip(chunk, _forward_sentences(tts, [sentences[i][1] for i in chunk])):
+            sentence_wavs[i] = wav
+
+    # Write every sentence straight into one preallocated int16 buffer per text;
+    # the buffers start zeroed, so the pauses between sentences need no copy
+    totals = [0] * len(texts)
+    for (text_index, _), wav in zip(sentences, sentence_wavs):
+        totals[text_index] += len(wav) + SENTENCE_PAUSE_SAMPLES
+    outputs = [np.zeros(total, dtype=np.int16) for total in totals]
+    positions = [0] * len(texts)
+    for (text_index, _), wav in zip(sentences, sentence_wavs):
+        start = positions[text_index]
+        to_int16(wav, out=outputs[text_index][start:start + len(wav)])
+        positions[text_index] = start + len(wav) + SENTENCE_PAUSE_SAMPLES
+    return outputs
+
+
+def synthesize_requests(tts, requests: Sequence[Tuple[str, float]]) -> List[np.ndarray]:
+    """Synthesize a micro-batch of (text, speed) requests, batching requests that share a speed."""
+    results = [None] * len(requests)
+    by_speed = {}
+    for index, (_, speed) in enumerate(requests):
+        by_speed.setdefault(speed, []).append(index)
+    for speed, indices in by_speed.items():
+        wavs = synthesize_batch(tts, [requests[i][0] for i in indices], speed)
+        for i, wav in zip(indices, wavs):
+            results[i] = wav
+    return results
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The space's modules live at the top level of huggingface_space_coqui/, as in app.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
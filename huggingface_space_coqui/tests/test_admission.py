@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def wait_for_queue(controller, size):
+    deadline = time.monotonic() + 5
+    while controller.qsize() < size:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def queue_requests(controller, requests, started):
+    """Start a thread per (name, cost) request, each queued before the next; they log the order they ran in."""
+    def run(name, cost):
+        with controller.admit(cost):
+            started.append(name)
+
+    threads = []
+    for name, cost in requests:
+        queued = controller.qsize()
+        threads.append(threading.Thread(target=run, args=(name, cost)))
+        threads[-1].start()
+        wait_for_queue(controller, queued + 1)
+    return threads
+
+
+def test_queue_full():
+    controller = AdmissionController(max_concurrency=1, max_depth=1, max_wait_s=5)
+    blocker = controller.acquire(100)
+    threads = queue_requests(controller, [('waiting', 100)], [])
+    with pytest.raises(Overloaded) as rejected:
+        controller.acquire(100)
+    assert rejected.value.retry_after >= 1
+    controller.release(blocker)
+    threads[0].join()
+    assert controller.stats()['rejected']['queue_full'] == 1
+
+
+def test_predicted_wait():
+    controller = AdmissionController(max_concurrency=1, max_wait_s=5)
+    controller.release(controller.acquire(100))
+    controller._request_rate = 10.0  # Characters per second
+    blocker = controller.acquire(1000)  # About 100s of synthesis
+    with pytest.raises(Overloaded) as rejected:
+        controller.acquire(100)
+    assert rejected.value.retry_after > 5
+    controller.release(blocker)
+    assert controller.stats()['rejected']['predicted_wait'] == 1
+
+
+def test_cheapest_first():
+    controller = AdmissionController(max_concurrency=1, max_wait_s=5, aging_chars_per_second=0)
+    blocker = controller.acquire(100)
+    started = []
+    threads = queue_requests(controller, [('chapter', 5000), ('sentence', 50), ('passage', 500)], started)
+    controller.release(blocker)
+    for thread in threads:
+        thread.join()
+    assert started == ['sentence', 'passage', 'chapter']
+
+
+def test_waiting_requests_age():
+    controller = AdmissionController(max_concurrency=1, max_wait_s=5, aging_chars_per_second=1000)
+    blocker = controller.acquire(100)
+    started = []
+    threads = queue_requests(controller, [('old', 500)], started)
+    time.sleep(0.6)  # Worth 600 characters of cost
+    threads += queue_requests(controller, [('new', 100)], started)
+    controller.release(blocker)
+    for thread in threads:
+        thread.join()
+    assert started == ['old', 'new']
+
+
+def test_timeout():
+    controller = AdmissionController(max_concurrency=1, max_wait_s=0.2)
+    blocker = controller.acquire(100)
+    start = time.monotonic()
+    with pytest.raises(Overloaded):
+        controller.acquire(100)
+    assert time.monotonic() - start >= 0.2
+    assert controller.qsize() == 0
+    controller.release(blocker)
+    assert controller.stats()['rejected']['timeout'] == 1
@@ -0,0 +1,30 @@
+import logging
+import threading
+
+import numpy as np
+
+from audio_cache import AudioCache
+
+
+def test_concurrent_puts_of_one_key(tmp_path, caplog):
+    cache = AudioCache(memory_budget_bytes=1 << 20, disk_dir=str(tmp_path), disk_budget_bytes=1 << 30)
+    audio = np.arange(4000, dtype=np.int16)
+
+    for index in range(50):
+        start = threading.Barrier(4)
+
+        def put():
+            start.wait()
+            cache.put(f"{index:064x}", audio.copy())
+
+        threads = [threading.Thread(target=put) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+    files = list(tmp_path.glob('*/*'))
+    assert all(path.suffix == '.npy' for path in files)
+    assert cache.stats()['disk_entries'] == 50
+    assert cache.stats()['disk_bytes'] == sum(path.stat().st_size for path in files)
@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+from audio_utils import STRETCH_FFT_SIZE, time_stretch
+
+
+@pytest.mark.parametrize('length', [1, 500, STRETCH_FFT_SIZE - 1, STRETCH_FFT_SIZE, 5000])
+@pytest.mark.parametrize('rate', [0.5, 1.5])
+def test_time_stretch_length(length, rate):
+    samples = (np.sin(np.arange(length) * 0.05) * 8000).astype(np.int16)
+    stretched = time_stretch(samples, rate)
+    assert stretched.dtype == np.int16
+    assert len(stretched) == int(round(length / rate))
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from batching import MicroBatcher
+
+
+def make_batcher(**kwargs):
+    """Batcher whose batch function takes 10ms per item and records the order items ran in."""
+    ran = []
+    gate = threading.Event()
+
+    def batch_fn(items):
+        gate.wait()
+        time.sleep(0.01 * len(items))
+        ran.extend(items)
+        return items
+
+    return MicroBatcher(batch_fn, max_batch_size=2, window_ms=0, concurrency=1, **kwargs), ran, gate
+
+
+def test_short_requests_finish_before_long_one():
+    batcher, ran, gate = make_batcher()
+    long_futures = [batcher.submit(('long', i), cost=5000) for i in range(50)]
+    short_futures = [batcher.submit(('short', i), cost=40) for i in range(5)]
+    gate.set()
+    for future in short_futures + long_futures:
+        future.result(timeout=10)
+
+    last_short = max(ran.index(('short', i)) for i in range(5))
+    # Only the long request's first batch was taken before the short ones were queued
+    assert last_short < 2 + 5
+    assert ran[-1][0] == 'long'
+
+
+def test_waiting_items_age():
+    batcher, ran, gate = make_batcher(aging_chars_per_second=1000.0)
+    blocker = batcher.submit('blocker')
+    time.sleep(0.05)  # Let the blocker's batch start
+    old = batcher.submit('old', cost=500)
+    time.sleep(0.6)  # Worth 600 characters of cost
+    new = batcher.submit('new', cost=100)
+    gate.set()
+    for future in (blocker, old, new):
+        future.result(timeout=10)
+    assert ran == ['blocker', 'old', 'new']
+
+
+def test_background_items_wait_for_foreground():
+    batcher, ran, gate = make_batcher()
+    blocker = batcher.submit('blocker')
+    time.sleep(0.05)  # Let the blocker's batch start
+    background = [batcher.submit(('background', i), cost=0, background=True) for i in range(4)]
+    foreground = [batcher.submit(('foreground', i), cost=100000) for i in range(4)]
+    gate.set()
+    for future in [blocker] + background + foreground:
+        future.result(timeout=10)
+    assert [kind for kind, _ in ran[1:5]] == ['foreground'] * 4
+
+
+def test_solo_item_runs_alone():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or items,
+                           max_batch_size=8, window_ms=200, concurrency=1)
+    futures = [batcher.submit(i, cost=10, solo=i == 0) for i in range(4)]
+    for future in futures:
+        future.result(timeout=10)
+    assert batches == [[0], [1, 2, 3]]
@@ -0,0 +1,17 @@
+import numpy as np
+
+from jobs import DONE, JobQueue
+
+
+def test_finished_jobs_bounded_by_bytes():
+    jobs = JobQueue(lambda text, speed, model_name: np.zeros(len(text), dtype=np.int16),
+                    max_finished_bytes=3000)
+    submitted = []
+    for index in range(4):
+        job = jobs.submit(f"{index}" * 1000, 1.0)  # 2000 bytes of audio each
+        assert jobs.wait(job.id, timeout=5).status == DONE
+        submitted.append(job)
+
+    # Two results would exceed the budget, so only the newest is kept
+    assert [jobs.get(job.id) is not None for job in submitted] == [False, False, False, True]
+    assert jobs.finished_bytes == 2000
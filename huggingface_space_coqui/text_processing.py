@@ -0,0 +1,106 @@
+"""
+Text helpers shared by the synthesis paths of the Coqui TTS space.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Longest piece of text handed to the model in one call when streaming
+MAX_SENTENCE_CHARS = 400
+
+# Split after sentence punctuation (optionally followed by a closing quote/bracket) or at line breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…]["\'”’)\]])\s+|(?<=[.!?…])\s+|\s*\n+\s*')
+
+# Abbreviations that end with a period but do not end a sentence
+_ABBREVIATIONS = {
+    'mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'sr.', 'jr.', 'st.', 'mt.',
+    'vs.', 'etc.', 'e.g.', 'i.e.', 'no.', 'vol.', 'ch.', 'fig.',
+}
+
+
+# Typographic punctuation folded to the plain ASCII the model's cleaners expect
+_PUNCTUATION_MAP = str.maketrans({
+    '“': '"', '”': '"', '„': '"', '«': '"', '»': '"',
+    '‘': "'", '’': "'", '‚': "'",
+    '–': '-', '—': '-', '\u00a0': ' ',
+})
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a passage, used both for synthesis and for cache keys
+
+    Texts that only differ in Unicode form, typographic quotes or whitespace
+    normalize to the same string and therefore share cached audio.
+    """
+    text = unicodedata.normalize('NFKC', text).translate(_PUNCTUATION_MAP)
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n\s*', '\n', text)
+    return text.strip()
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Canonical form of one sentence, used as its synthesis text and cache key
+
+    Runs of repeated punctuation are collapsed ("!!!" -> "!", "....." -> "...")
+    so the recurring lines of web novels share one cache entry. Sentences with
+    nothing to pronounce (scene breaks like "* * *", "..." lines) normalize to
+    an empty string and are rendered as a pause.
+    """
+    sentence = normalize_text(sentence).replace('…', '...')
+    if not any(c.isalnum() for c in sentence):
+        return ''
+    sentence = re.sub(r'\.{4,}', '...', sentence)
+    sentence = re.sub(r'([!?])[!?]*', lambda m: '?!' if '?' in m.group(0) and '!' in m.group(0) else m.group(1), sentence)
+    sentence = re.sub(r'([,;:\-])\1+', r'\1', sentence)
+    return re.sub(r'\s+', ' ', sentence).strip()
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break an over-long sentence at the last comma/semicolon (or space) before max_chars."""
+    pieces = []
+    while len(sentence) > max_chars:
+        window = sentence[:max_chars]
+        cut = max(window.rfind(', '), window.rfind('; '), window.rfind(': '))
+        if cut <= 0:
+            cut = window.rfind(' ')
+        if cut <= 0:
+            cut = max_chars - 1
+        pieces.append(sentence[:cut + 1].strip())
+        sentence = sentence[cut + 1:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def split_sentences(text: str, max_chars: int = MAX_SENTENCE_CHARS) -> List[str]:
+    """
+    Split text into sentences small enough to synthesize one at a time
+
+    Args:
+        text: Input passage
+        max_chars: Sentences longer than this are broken at clause boundaries
+
+    Returns:
+        List of non-empty sentences in reading order
+    """
+    sentences = []
+    pending = ''
+    for part in _SENTENCE_BOUNDARY.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        # Keep going when the previous piece ended in an abbreviation or the next one
+        # continues the sentence in lowercase ("How are you?" she asked.)
+        if pending and (pending.rsplit(' ', 1)[-1].lower() in _ABBREVIATIONS or part[0].islower()):
+            pending = f"{pending} {part}"
+            continue
+        if pending:
+            sentences.extend(_split_long(pending, max_chars))
+        pending = part
+    if pending:
+        sentences.extend(_split_long(pending, max_chars))
+    return sentences
+
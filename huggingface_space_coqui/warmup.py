@@ -0,0 +1,94 @@
+"""
+Startup warm-up and readiness state for the Coqui TTS space.
+
+The first synthesis after a model load pays for one-off work: lazy
+initialization in torch, the tokenizer and the phonemizer, allocator growth
+for the largest tensor shapes, and scipy/libsndfile setup for stretching and
+encoding. Running a few representative inputs at startup moves that cost
+out of the first user requests, and the time it takes is reported apart
+from the model load time.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Representative inputs: a short line, dialogue with punctuation and numbers, and a long
+# multi-sentence passage, so the vocoder sees both small and batch-sized inputs
+WARMUP_TEXTS = [
+    "Hello.",
+    "\"Are you sure?\" she asked, glancing at the clock. It was 3:45, and chapter 12 wasn't finished.",
+    "The mountain gate opened slowly, and the elders filed out one by one. "
+    "Nobody spoke; the wind carried the sound of distant bells across the valley. "
+    "He waited until the last of them had passed, then stepped forward into the light.",
+]
+
+
+class StartupState:
+    """
+    Tracks model loading and warm-up, and whether the service is ready
+
+    The service is ready once warm-up has finished (or was skipped); it is
+    never ready if warm-up failed, since synthesis is evidently broken.
+    """
+
+    def __init__(self):
+        self.model_load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_skipped = False
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self.error is None
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until warm-up is over; returns whether the service is ready."""
+        self._ready.wait(timeout)
+        return self.ready
+
+    def skip_warmup(self):
+        self.warmup_skipped = True
+        self._ready.set()
+
+    def warm_up(self, warm_fn: Callable[[], Any], background: bool = True):
+        """Run warm_fn (in a daemon thread if background), timing it and marking the service ready."""
+        if background:
+            self._thread = threading.Thread(target=self._run, args=(warm_fn,), name="tts-warmup", daemon=True)
+            self._thread.start()
+        else:
+            self._run(warm_fn)
+
+    def _run(self, warm_fn: Callable[[], Any]):
+        logger.info("Warming up synthesis...")
+        start_time = time.perf_counter()
+        try:
+            warm_fn()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Warm-up failed, service will not report ready: {self.error}")
+        else:
+            self.warmup_seconds = time.perf_counter() - start_time
+            logger.info(f"✅ Warm-up finished in {self.warmup_seconds:.1f}s, ready for requests")
+        finally:
+            self._ready.set()
+
+    def status(self) -> Dict[str, Any]:
+        if self.error is not None:
+            status = 'failed'
+        elif self._ready.is_set():
+            status = 'ready'
+        else:
+            status = 'warming_up'
+        return {
+            'status': status,
+            'model_load_seconds': self.model_load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'warmup_skipped': self.warmup_skipped,
+            'error': self.error,
+        }
@@ -0,0 +1,202 @@
+"""
+Multi-process synthesis worker pool.
+
+Each worker process loads the default TTS model once at startup and then
+serves micro-batches sent by the dispatcher in the server process. Batches
+are routed to the worker with the fewest characters in flight, so all cores
+of the host can be kept busy with one model copy per worker. Other models
+are loaded on demand into each worker's own memory-budgeted registry.
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often the collector checks that worker processes are alive, busy or not
+LIVENESS_INTERVAL = 0.5
+
+
+def _worker_main(worker_id: int, model_name: str, torch_threads: int, memory_budget_bytes: int, tasks, results):
+    """Worker process entry point: preload the default model, then serve batches until told to stop."""
+    import torch
+    from model_registry import ModelRegistry
+    from phoneme_cache import PHONEME_CACHE
+    from synthesis import estimate_model_bytes, load_model, synthesize_requests
+
+    torch.set_num_threads(torch_threads)
+    models = ModelRegistry(load_model, estimate_model_bytes, memory_budget_bytes, pinned=[model_name])
+    try:
+        tts = models.get(model_name)
+    except Exception as e:
+        results.put(('failed', worker_id, None, f"{type(e).__name__}: {e}"))
+        return
+    results.put(('ready', worker_id, None, tts.synthesizer.output_sample_rate))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, task_model, requests = task
+        try:
+            tts = models.get(task_model)
+            wavs = synthesize_requests(tts, requests)
+            results.put(('done', worker_id, task_id,
+                         (task_model, tts.synthesizer.output_sample_rate, wavs, PHONEME_CACHE.stats())))
+        except Exception as e:
+            # Exceptions from torch are not always picklable, send the message instead
+            results.put(('error', worker_id, task_id, f"{type(e).__name__}: {e}"))
+
+
+class SynthesisWorkerPool:
+    """
+    Pool of worker processes with a least-loaded dispatcher
+
+    Args:
+        model_name: Coqui model every worker preloads (and never evicts)
+        num_workers: Number of worker processes
+        torch_threads: Intra-op torch threads per worker (0 = split the CPU cores evenly)
+        memory_budget_bytes: Per-worker budget for models loaded on demand
+    """
+
+    def __init__(self, model_name: str, num_workers: int, torch_threads: int = 0, memory_budget_bytes: int = 0):
+        self.model_name = model_name
+        self.num_workers = max(1, num_workers)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.sample_rate = None
+        # Output sample rate of every model a worker has synthesized with
+        self.sample_rates: Dict[str, int] = {}
+        # Front-end cache stats of every worker, as of its last finished batch
+        self.phoneme_stats: Dict[int, dict] = {}
+
+        # fork, not spawn: spawn re-runs the whole app.py (model load + UI) in every worker.
+        # The pool is created before the server process touches torch, so forking is safe.
+        context = mp.get_context('fork')
+        self._results = context.Queue()
+        self._task_queues = [context.Queue() for _ in range(self.num_workers)]
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(worker_id, model_name, self.torch_threads, memory_budget_bytes,
+                      self._task_queues[worker_id], self._results),
+                name=f"tts-worker-{worker_id}",
+                daemon=True
+            )
+            for worker_id in range(self.num_workers)
+        ]
+
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._pending: Dict[int, Tuple[int, int, Future]] = {}
+        self._load = [0] * self.num_workers
+        self._ready = set()
+        self._ready_event = threading.Event()
+        self._startup_error = None
+
+        for process in self._processes:
+            process.start()
+        logger.info(f"Started {self.num_workers} synthesis worker(s) with {self.torch_threads} torch thread(s) each")
+
+        self._collector = threading.Thread(target=self._collect_results, name="tts-pool-collector", daemon=True)
+        self._collector.start()
+
+    def wait_ready(self, timeout: float = None):
+        """Block until every worker has loaded its model."""
+        if not self._ready_event.wait(timeout):
+            raise TimeoutError(f"Only {len(self._ready)}/{self.num_workers} TTS workers ready after {timeout}s")
+        if self._startup_error:
+            raise RuntimeError(f"TTS worker failed to start: {self._startup_error}")
+
+    def submit(self, requests: Sequence[Tuple[str, float]], model_name: str = None) -> Future:
+        """
+        Send a batch of (text, speed) requests for one model (default: the preloaded one) to the least-loaded worker.
+
+        Dead workers are skipped; if none is alive the returned future has already failed.
+        """
+        future = Future()
+        cost = sum(len(text) for text, _ in requests)
+        live_workers = [w for w, process in enumerate(self._processes) if process.is_alive()]
+        if not live_workers:
+            future.set_exception(RuntimeError("No TTS worker is alive"))
+            return future
+        with self._lock:
+            worker_id = min(live_workers, key=lambda w: self._load[w])
+            task_id = next(self._task_ids)
+            self._load[worker_id] += cost
+            self._pending[task_id] = (worker_id, cost, future)
+        self._task_queues[worker_id].put((task_id, model_name or self.model_name, list(requests)))
+        return future
+
+    def alive(self) -> bool:
+        """Whether every worker process is still running."""
+        return all(process.is_alive() for process in self._processes)
+
+    def in_flight(self) -> List[int]:
+        """Characters currently queued or being synthesized, per worker."""
+        with self._lock:
+            return list(self._load)
+
+    def shutdown(self):
+        for tasks in self._task_queues:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+
+    def _finish(self, task_id: int) -> Future:
+        with self._lock:
+            worker_id, cost, future = self._pending.pop(task_id, (None, 0, None))
+            if future is not None:
+                self._load[worker_id] -= cost
+        # A task already failed because its worker died resolves to a throwaway future
+        return future or Future()
+
+    def _fail_dead_workers(self):
+        for worker_id, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            with self._lock:
+                lost = [task_id for task_id, (w, _, _) in self._pending.items() if w == worker_id]
+            for task_id in lost:
+                self._finish(task_id).set_exception(
+                    RuntimeError(f"TTS worker {worker_id} exited (code {process.exitcode})"))
+            if worker_id not in self._ready and not self._ready_event.is_set():
+                self._startup_error = f"worker {worker_id} exited during startup"
+                self._ready_event.set()
+
+    def _collect_results(self):
+        last_check = time.monotonic()
+        while True:
+            # Checked on a timer, not only when idle: under steady load from the other workers
+            # the results queue is never empty, and a dead worker's tasks would hang forever
+            if time.monotonic() - last_check >= LIVENESS_INTERVAL:
+                self._fail_dead_workers()
+                last_check = time.monotonic()
+            try:
+                kind, worker_id, task_id, payload = self._results.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                continue
+
+            if kind == 'ready':
+                self.sample_rate = payload
+                self.sample_rates[self.model_name] = payload
+                self._ready.add(worker_id)
+                logger.info(f"✅ TTS worker {worker_id} ready ({len(self._ready)}/{self.num_workers})")
+                if len(self._ready) == self.num_workers:
+                    self._ready_event.set()
+            elif kind == 'failed':
+                self._startup_error = payload
+                self._ready_event.set()
+            elif kind == 'done':
+                model_name, sample_rate, wavs, phoneme_stats = payload
+                self.sample_rates[model_name] = sample_rate
+                self.phoneme_stats[worker_id] = phoneme_stats
+                self._finish(task_id).set_result(wavs)
+            elif kind == 'error':
+                self._finish(task_id).set_exception(RuntimeError(payload))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Gemini Mock Server
+Local stand-in for the Gemini generateContent endpoint, for testing and tuning
+gemini_translator.py offline. "Translates" each string of the prompt's JSON
+input as "[Language] text" and answers like the real API: usageMetadata token
+counts, HTTP 429 with a RetryInfo delay when a key is over its per-minute
+quota, and gzip in both directions.
+
+Latency, random rate limits, truncated (malformed) JSON responses and the
+refusal of gzipped request bodies can be injected to exercise the
+translator's retry and fallback paths. GET /stats returns the
+server's counters.
+
+Usage:
+    python scripts/gemini_mock_server.py --port 8765 --latency 0.5 --rpm 60
+    GEMINI_API_URL=http://127.0.0.1:8765/v1beta/models/gemini-2.5-flash:generateContent \\
+        GEMINI_API_KEY=k1,k2 python scripts/gemini_translator.py
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+
+class MockGemini:
+    """Behaviour and counters shared by all request handlers of one server."""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, rpm: float = 0, tpm: float = 0,
+                 rate_limit_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 1234,
+                 reject_gzip: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        # HTTP status gzipped request bodies are refused with (0 accepts them)
+        self.reject_gzip = reject_gzip
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # Per key: (time, tokens) of the requests accepted in the last minute
+        self.windows: Dict[str, deque] = defaultdict(deque)
+        self.stats = {'requests': 0, 'translated': 0, 'rate_limited': 0, 'quota_exceeded': 0,
+                      'malformed': 0, 'gzip_requests': 0, 'bytes_received': 0}
+
+    def admit(self, key: str, tokens: int) -> Optional[float]:
+        """Count a request against the key's quota; returns a retry delay if it is over quota."""
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.rng.random() < self.rate_limit_rate:
+                self.stats['rate_limited'] += 1
+                return 1.0
+            now = time.monotonic()
+            window = self.windows[key]
+            while window and window[0][0] <= now - 60:
+                window.popleft()
+            over_rpm = self.rpm and len(window) + 1 > self.rpm
+            over_tpm = self.tpm and window and sum(t for _, t in window) + tokens > self.tpm
+            if over_rpm or over_tpm:
+                self.stats['rate_limited'] += 1
+                self.stats['quota_exceeded'] += 1
+                return max(1.0, window[0][0] + 60 - now)
+            window.append((now, tokens))
+            return None
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def malformed(self) -> bool:
+        with self.lock:
+            if self.rng.random() < self.malformed_rate:
+                self.stats['malformed'] += 1
+                return True
+            return False
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+
+def parse_prompt(prompt: str) -> Tuple[str, Dict[str, str]]:
+    """Target language and input strings of a gemini_translator.py prompt."""
+    match = re.search(r'Translate to (.+?)\. Return JSON only', prompt)
+    language = match.group(1) if match else 'Unknown'
+    return language, json.loads(prompt[prompt.rindex('Input: ') + len('Input: '):])
+
+
+def make_handler(mock: MockGemini):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoint
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, data: Dict):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzipped:
+                body = gzip.compress(body)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_error_json(self, status: int, message: str, details: list = None):
+            error = {'code': status, 'message': message}
+            if details:
+                error['details'] = details
+            self.send_json(status, {'error': error})
+
+        def do_GET(self):
+            if urlparse(self.path).path == '/stats':
+                self.send_json(200, mock.snapshot())
+            else:
+                self.send_error_json(404, "Not found")
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            mock.count('bytes_received', len(body))
+            if not url.path.endswith(':generateContent'):
+                self.send_error_json(404, "Not found")
+                return
+            key = parse_qs(url.query).get('key', [''])[0]
+            if not key:
+                self.send_error_json(403, "Method doesn't allow unregistered callers")
+                return
+            try:
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    mock.count('gzip_requests')
+                    if mock.reject_gzip:
+                        self.send_error_json(mock.reject_gzip, "Unsupported Content-Encoding: gzip")
+                        return
+                    body = gzip.decompress(body)
+                prompt = json.loads(body)['contents'][0]['parts'][0]['text']
+                language, strings = parse_prompt(prompt)
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                self.send_error_json(400, f"Invalid request: {e}")
+                return
+
+            prompt_tokens = len(prompt) // 4 + 1
+            retry_delay = mock.admit(key, prompt_tokens * 2)
+            if retry_delay is not None:
+                self.send_error_json(429, "Resource has been exhausted (e.g. check quota).", [{
+                    '@type': 'type.googleapis.com/google.rpc.RetryInfo',
+                    'retryDelay': f"{retry_delay:.0f}s",
+                }])
+                return
+
+            time.sleep(mock.delay())
+            text = json.dumps({k: f"[{language}] {v}" for k, v in strings.items()}, ensure_ascii=False)
+            if mock.malformed():
+                text = text[:len(text) // 2]
+            else:
+                mock.count('translated', len(strings))
+            output_tokens = len(text) // 4 + 1
+            self.send_json(200, {
+                'candidates': [{'content': {'parts': [{'text': f"```json\n{text}\n```"}], 'role': 'model'},
+                                'finishReason': 'STOP'}],
+                'usageMetadata': {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens,
+                                  'totalTokenCount': prompt_tokens + output_tokens},
+            })
+
+    return Handler
+
+
+def start_server(mock: MockGemini, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Serve the mock from a daemon thread; port 0 picks a free port (see server.server_port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='gemini-mock', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Gemini generateContent endpoint")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help="Seconds per successful request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument('--rpm', type=float, default=0, help="Requests per minute per key (0: unlimited)")
+    parser.add_argument('--tpm', type=float, default=0, help="Tokens per minute per key (0: unlimited)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 429 regardless of quota")
+    parser.add_argument('--malformed-rate', type=float, default=0.0,
+                        help="Fraction of responses whose JSON is cut off")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--reject-gzip', type=int, default=0, metavar='STATUS',
+                        help="Refuse gzipped request bodies with this HTTP status, e.g. 415 (0: accept them)")
+    args = parser.parse_args()
+
+    mock = MockGemini(args.latency, args.jitter, args.rpm, args.tpm,
+                      args.rate_limit_rate, args.malformed_rate, args.seed, args.reject_gzip)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    print(f"Mock Gemini listening on http://{args.host}:{args.port}/v1beta/models/gemini-2.5-flash:generateContent")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStats: {json.dumps(mock.snapshot())}")
+
+
+if __name__ == '__main__':
+    main()
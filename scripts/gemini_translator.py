@@ -2,15 +2,24 @@
 """
 Gemini I18n Translator - Optimized with Multi-Key Support
 Translates missing strings in strings.xml files using Google Gemini API.
-Supports multiple API keys with automatic rotation on rate limits.
+Supports multiple API keys, each throttled by its own requests-per-minute and
+tokens-per-minute sliding windows, and translates many languages and batches
+concurrently.
 """
 
+import argparse
+import gzip
+import hashlib
 import os
 import sys
+import threading
 import xml.etree.ElementTree as ET
 import requests
 import time
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -26,16 +35,36 @@ while os.environ.get(f'GEMINI_API_KEY_{i}'):
     API_KEYS.append(os.environ.get(f'GEMINI_API_KEY_{i}'))
     i += 1
 
-API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+MODEL_NAME = "gemini-2.5-flash"
+# GEMINI_API_URL points the translator at another endpoint, e.g. gemini_mock_server.py
+API_URL = os.environ.get('GEMINI_API_URL',
+                         f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:generateContent")
 PROJECT_ROOT = Path('.')
-I18N_BASE_DIR = PROJECT_ROOT / 'i18n/src/commonMain/composeResources'
+# Past translations by source-text hash and language, reused instead of calling the API
+TRANSLATION_MEMORY_FILE = Path(os.environ.get('GEMINI_TM_FILE', PROJECT_ROOT / '.gemini_translation_memory.json'))
+# Batches finished in the current run, replayed by --resume after a crash or Ctrl-C
+JOURNAL_FILE = Path(os.environ.get('GEMINI_JOURNAL_FILE', PROJECT_ROOT / '.gemini_translation_journal.jsonl'))
+I18N_BASE_DIR = Path(os.environ.get('GEMINI_I18N_DIR', PROJECT_ROOT / 'i18n/src/commonMain/composeResources'))
 SOURCE_FILE = I18N_BASE_DIR / 'values/strings.xml'
-BATCH_SIZE = 200  # Max strings per request (Gemini 2.0 Flash handles ~30k tokens)
+# Estimated input tokens per request. Batches are filled up to this budget, so short labels
+# share a request and long descriptions don't push the response past the output limit
+BATCH_TOKENS = int(os.environ.get('GEMINI_BATCH_TOKENS', 4000))
 MAX_RETRIES_PER_KEY = 2   # Retry on rate limit per key before switching
 
-# Track current API key index and rate-limited keys
-current_key_index = 0
-rate_limited_keys = set()  # Track which keys are rate-limited
+# Per-key quotas (gemini-2.5-flash free tier). GEMINI_RPM / GEMINI_TPM take one value
+# for all keys or a comma-separated list in key order, e.g. GEMINI_RPM='10,10,1000'
+DEFAULT_RPM = 10
+DEFAULT_TPM = 250000
+# Seconds a request counts against its key's quota: the API's minute plus slack for request transit
+QUOTA_WINDOW = 61.0
+# Batches in flight at once, across all languages
+DEFAULT_CONCURRENCY = int(os.environ.get('GEMINI_CONCURRENCY', max(2, 4 * len(API_KEYS))))
+# Keep-alive connections per key; any batch may use any key, so default to the concurrency
+POOL_SIZE = int(os.environ.get('GEMINI_POOL_SIZE', DEFAULT_CONCURRENCY))
+# Gzip request bodies at least this large (0 disables); responses are always requested gzipped
+COMPRESS_MIN_BYTES = int(os.environ.get('GEMINI_COMPRESS_MIN_BYTES', 1024))
+# Google front ends only gzip responses for clients whose User-Agent mentions gzip
+USER_AGENT = 'IReader-gemini-translator (gzip)'
 
 LANG_NAMES = {
     'ar': 'Arabic', 'de': 'German', 'es': 'Spanish', 'fr': 'French',
@@ -48,47 +77,318 @@ LANG_NAMES = {
     'no': 'Norwegian', 'el': 'Greek', 'he': 'Hebrew', 'fa': 'Persian',
 }
 
-def get_next_api_key() -> Optional[str]:
-    """Get the next available API key, rotating through available keys."""
-    global current_key_index
-    
-    if not API_KEYS:
-        return None
+class QuotaWindow:
+    """
+    Amounts taken in the last minute, checked against a per-minute quota the way the API counts it.
+
+    No 60 second window ever holds more than the quota, including the first
+    minute of a run (a token bucket starting full would allow twice as much).
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.taken = deque()  # (time, amount), oldest first
+        self.blocked_until = 0.0
+
+    def _expire(self, now: float):
+        while self.taken and self.taken[0][0] <= now - QUOTA_WINDOW:
+            self.taken.popleft()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` fits in the window (amounts above the quota only need an empty window)."""
+        self._expire(now)
+        wait = max(0.0, self.blocked_until - now)
+        excess = sum(taken for _, taken in self.taken) + amount - self.per_minute
+        for taken_at, taken in self.taken:
+            if excess <= 0:
+                break
+            excess -= taken
+            wait = max(wait, taken_at + QUOTA_WINDOW - now)
+        return wait
+
+    def take(self, amount: float, now: float):
+        self.taken.append((now, amount))
+
+    def pause(self, seconds: float, now: float):
+        """Take nothing more for `seconds`."""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class KeyLimiter:
+    """
+    Requests-per-minute and tokens-per-minute quota windows of one API key, with usage stats.
+
+    Each key also has its own keep-alive session, so requests reuse pooled
+    connections instead of paying for a TCP and TLS handshake every time.
+    """
+
+    def __init__(self, index: int, key: str, rpm: float, tpm: float):
+        self.index = index
+        self.key = key
+        self.requests = QuotaWindow(rpm)
+        self.tokens = QuotaWindow(tpm)
+        self.consecutive_rate_limits = 0
+        self.sent = 0
+        self.tokens_used = 0
+        self.rate_limited = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'})
+        self.stats_lock = threading.Lock()
+        self.body_bytes = 0
+        self.sent_bytes = 0
+        self.received_bytes = 0
+        self.gzip_responses = 0
+
+    def wait_time(self, tokens: float, now: float) -> float:
+        return max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    def connections_opened(self) -> int:
+        """Connections the session's pools have opened so far."""
+        adapter = self.session.get_adapter(API_URL)
+        pools = adapter.poolmanager.pools
+        return sum(pools[pool_key].num_connections for pool_key in pools.keys())
+
+
+class KeyPool:
+    """
+    Hands out API keys to concurrent requests without exceeding any key's quota.
+
+    acquire() picks the key that can serve the request soonest and blocks
+    until its quota windows allow it; a 429 pauses only the key that got it.
+    """
+
+    def __init__(self, keys: List[str], rpm: List[float], tpm: List[float]):
+        self.limiters = [KeyLimiter(i, key, rpm[i], tpm[i]) for i, key in enumerate(keys)]
+        self.condition = threading.Condition()
+        self.wait_seconds = 0.0
+
+    def acquire(self, tokens: float) -> KeyLimiter:
+        with self.condition:
+            start = time.monotonic()
+            while True:
+                now = time.monotonic()
+                limiter = min(self.limiters, key=lambda l: (l.wait_time(tokens, now), l.sent))
+                wait = limiter.wait_time(tokens, now)
+                if wait <= 0:
+                    limiter.requests.take(1, now)
+                    limiter.tokens.take(tokens, now)
+                    limiter.sent += 1
+                    self.wait_seconds += now - start
+                    return limiter
+                self.condition.wait(wait)
+
+    def settle(self, limiter: KeyLimiter, estimated_tokens: float, used_tokens: Optional[int]):
+        """Replace the token estimate taken by acquire() with the usage the API reported."""
+        with self.condition:
+            limiter.consecutive_rate_limits = 0
+            if used_tokens is not None:
+                # An overestimate stays counted until it expires: subtracting it now would let the
+                # window under-count between the estimate expiring and the correction expiring
+                limiter.tokens.take(max(0, used_tokens - estimated_tokens), time.monotonic())
+                limiter.tokens_used += used_tokens
+            else:
+                limiter.tokens_used += int(estimated_tokens)
+            self.condition.notify_all()
+
+    def penalize(self, limiter: KeyLimiter, retry_after: Optional[float]) -> float:
+        """Pause a key that got HTTP 429 (for retry_after, else exponential backoff). Returns the pause."""
+        with self.condition:
+            limiter.rate_limited += 1
+            limiter.consecutive_rate_limits += 1
+            pause = retry_after if retry_after is not None else min(60.0, 3.0 * 2 ** (limiter.consecutive_rate_limits - 1))
+            limiter.requests.pause(pause, time.monotonic())
+            self.condition.notify_all()
+            return pause
+
+
+def _per_key_quota(env_name: str, default: float) -> List[float]:
+    """One quota per API key: a single value applies to all keys, a comma-separated list is per key."""
+    values = [float(v) for v in os.environ.get(env_name, str(default)).split(',') if v.strip()]
+    if not values:
+        values = [default]
+    return [values[i] if i < len(values) else values[-1] for i in range(len(API_KEYS))]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, erring high: ~3 characters per token (Latin text is closer to 4)."""
+    return len(text) // 3 + 1
+
+
+def parse_retry_delay(response) -> Optional[float]:
+    """Retry delay from a 429 response (Retry-After header or the RetryInfo detail), if any."""
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        for detail in response.json().get('error', {}).get('details', []):
+            delay = detail.get('retryDelay')
+            if delay and delay.endswith('s'):
+                return float(delay[:-1])
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def post_json(limiter: KeyLimiter, payload: Dict) -> requests.Response:
+    """POST a JSON payload through the key's pooled session, gzipping large bodies unless disabled."""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    data = body
+    if 0 < COMPRESS_MIN_BYTES <= len(body) and not compression_rejected.is_set():
+        data = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
     
-    # If all keys are rate-limited, return None
-    if len(rate_limited_keys) >= len(API_KEYS):
-        return None
+    response = limiter.session.post(f"{API_URL}?key={limiter.key}", data=data, headers=headers, timeout=60)
     
-    # Find next non-rate-limited key
-    attempts = 0
-    while attempts < len(API_KEYS):
-        key = API_KEYS[current_key_index]
-        key_id = current_key_index
-        current_key_index = (current_key_index + 1) % len(API_KEYS)
-        
-        if key_id not in rate_limited_keys:
-            return key
-        
-        attempts += 1
+    with limiter.stats_lock:
+        limiter.body_bytes += len(body)
+        limiter.sent_bytes += len(data)
+        limiter.received_bytes += int(response.headers.get('Content-Length') or len(response.content))
+        if response.headers.get('Content-Encoding') == 'gzip':
+            limiter.gzip_responses += 1
+    return response
+
+
+def rejects_compression(response: requests.Response) -> bool:
+    """Whether the endpoint refused a gzipped body, as opposed to the request itself being invalid."""
+    if response.request.headers.get('Content-Encoding') != 'gzip':
+        return False
+    if response.status_code == 415:
+        return True
+    if response.status_code != 400:
+        return False
+    message = response.text.lower()
+    return any(word in message for word in ('content-encoding', 'content encoding', 'gzip', 'decompress'))
+
+
+KEY_POOL = KeyPool(API_KEYS, _per_key_quota('GEMINI_RPM', DEFAULT_RPM), _per_key_quota('GEMINI_TPM', DEFAULT_TPM))
+print_lock = threading.Lock()
+# Set once the endpoint refuses a gzipped request body; later requests go uncompressed
+compression_rejected = threading.Event()
+
+
+def log(message: str):
+    """print() that keeps lines from concurrent batches intact."""
+    with print_lock:
+        print(message, flush=True)
+
+
+class TranslationMemory:
+    """
+    Local store of past translations, saved as JSON.
+
+    entries[lang][source hash] holds a translation and the model that made it,
+    so the same English text is never sent twice for a language. keys[lang][key]
+    is the hash of the English text a key's current translation was made from;
+    when the source string changes, the hashes differ and the translation is stale.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Dict]] = {}
+        self.keys: Dict[str, Dict[str, str]] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                self.entries = data.get('entries', {})
+                self.keys = data.get('keys', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable translation memory {path}: {e}")
+
+    @staticmethod
+    def source_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def lookup(self, lang: str, source_hash: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(lang, {}).get(source_hash)
+            return entry['text'] if entry else None
+
+    def remember(self, lang: str, source_hash: str, translation: str, model: str):
+        with self.lock:
+            self.entries.setdefault(lang, {})[source_hash] = {
+                'text': translation,
+                'model': model,
+                'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+
+    def translated_from(self, lang: str, key: str) -> Optional[str]:
+        """Hash of the source text the key's current translation was made from, if known."""
+        with self.lock:
+            return self.keys.get(lang, {}).get(key)
+
+    def mark(self, lang: str, key: str, source_hash: str):
+        with self.lock:
+            self.keys.setdefault(lang, {})[key] = source_hash
+
+    def save(self):
+        with self.lock:
+            data = json.dumps({'version': self.VERSION, 'entries': self.entries, 'keys': self.keys},
+                              ensure_ascii=False, indent=1, sort_keys=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(data, encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+
+class BatchJournal:
+    """
+    Append-only JSON Lines log of finished batches, fsynced as each batch arrives.
     
-    return None
+    Locale files and the translation memory are only written once a whole
+    language is done. After a crash, Ctrl-C or a dead key, replaying the
+    journal into the translation memory lets the next run skip every batch
+    that was already paid for. The journal is deleted when a run completes.
+    """
 
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
 
-def mark_key_rate_limited(key: str):
-    """Mark an API key as rate-limited."""
-    global rate_limited_keys
-    try:
-        key_index = API_KEYS.index(key)
-        rate_limited_keys.add(key_index)
-        print(f"    [Key {key_index + 1}] Marked as rate-limited ({len(rate_limited_keys)}/{len(API_KEYS)} keys exhausted)")
-    except ValueError:
-        pass
+    def replay(self, memory: TranslationMemory) -> int:
+        """Put the journal's translations into the memory, returns how many there were."""
+        if not self.path.exists():
+            return 0
+        count = 0
+        for line in self.path.read_text(encoding='utf-8').splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from a crash mid-write
+            for source_hash, translation in record['translations'].items():
+                memory.remember(record['lang'], source_hash, translation, record['model'])
+                count += 1
+        return count
+
+    def open(self, resume: bool):
+        """Start journaling, keeping the existing journal only when resuming."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
 
+    def write(self, lang: str, translations: Dict[str, str]):
+        """Durably record a batch's translations, keyed by source text hash."""
+        if not translations:
+            return
+        line = json.dumps({'lang': lang, 'model': MODEL_NAME, 'translations': translations}, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
 
-def reset_rate_limits():
-    """Reset rate limit tracking (call after waiting period)."""
-    global rate_limited_keys
-    rate_limited_keys.clear()
+    def finish(self):
+        """Close and delete the journal once the run completed and everything is saved."""
+        with self.lock:
+            self.file.close()
+            self.path.unlink()
 
 
 def setup_io():
@@ -131,16 +431,56 @@ def indent_xml(elem, level=0):
         elem.tail = indent
 
 
-def translate_batch(strings: Dict[str, str], target_lang: str, batch_num: int = 1, total_batches: int = 1) -> Dict[str, str]:
-    """Translate using compact JSON format to minimize tokens. Supports multiple API keys with rotation."""
+def make_batches(strings: Dict[str, str], budget: int) -> List[Dict[str, str]]:
+    """Split strings into batches of at most `budget` estimated tokens (an oversized string gets its own)."""
+    batches = []
+    batch = {}
+    batch_tokens = 0
+    for key, text in strings.items():
+        tokens = estimate_tokens(json.dumps({key: text}, ensure_ascii=False))
+        if batch and batch_tokens + tokens > budget:
+            batches.append(batch)
+            batch = {}
+            batch_tokens = 0
+        batch[key] = text
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def split_batch(strings: Dict[str, str], target_lang: str, batch_num: int, total_batches: int,
+                part: str) -> Dict[str, str]:
+    """Retry a batch whose response was unusable as two halves, so one bad entry only loses itself."""
+    tag = f"[{target_lang} {batch_num}/{total_batches}{part}]"
+    if len(strings) < 2:
+        log(f"    {tag} Giving up on {', '.join(strings)}")
+        return {}
+    keys = list(strings.keys())
+    half = len(keys) // 2
+    log(f"    {tag} Splitting into batches of {half} and {len(keys) - half} strings")
+    translated = {}
+    for suffix, half_keys in (('a', keys[:half]), ('b', keys[half:])):
+        half_strings = {k: strings[k] for k in half_keys}
+        translated.update(translate_batch(half_strings, target_lang, batch_num, total_batches, part + suffix))
+    return translated
+
+def translate_batch(strings: Dict[str, str], target_lang: str, batch_num: int = 1, total_batches: int = 1,
+                    part: str = '') -> Dict[str, str]:
+    """
+    Translate using compact JSON format to minimize tokens. Sends through whichever API key has quota first.
+    
+    A truncated or unparseable response is retried in halves (tagged a/b after
+    the batch number) until the offending strings are isolated.
+    """
     if not API_KEYS:
-        print(f"    [ERROR] No API keys configured")
+        log(f"    [ERROR] No API keys configured")
         return {}
     
     lang_name = LANG_NAMES.get(target_lang, target_lang)
     input_data = {k: v for k, v in strings.items() if v}
+    tag = f"[{target_lang} {batch_num}/{total_batches}{part}]"
     
-    print(f"    [Batch {batch_num}/{total_batches}] Translating {len(input_data)} strings to {lang_name}...")
+    log(f"    {tag} Translating {len(input_data)} strings to {lang_name}...")
     
     prompt = f"""You are translating UI strings for IReader, an Android novel/book reader app.
 Context: This app lets users read novels, manage their library, browse book sources, customize reading settings (fonts, themes, scroll modes), and track reading progress. Terms like "chapter", "source", "library", "bookmark" refer to book/novel reading features.
@@ -149,140 +489,238 @@ Translate to {lang_name}. Return JSON only.
 Keep %1$s %d etc placeholders unchanged. Output: {{"key":"translation",...}}
 Input: {json.dumps(input_data, ensure_ascii=False)}"""
 
-    # Try each available API key
-    keys_tried = 0
-    max_keys_to_try = len(API_KEYS)
+    # Prompt plus a response about as long as the input strings
+    tokens = estimate_tokens(prompt) + estimate_tokens(json.dumps(input_data, ensure_ascii=False))
     
-    while keys_tried < max_keys_to_try:
-        api_key = get_next_api_key()
-        
-        if not api_key:
-            print(f"    [Batch {batch_num}] All API keys are rate-limited!")
-            # Wait and reset rate limits
-            wait_time = 60
-            print(f"    [Batch {batch_num}] Waiting {wait_time}s for rate limits to reset...")
-            time.sleep(wait_time)
-            reset_rate_limits()
-            api_key = get_next_api_key()
-            if not api_key:
-                print(f"    [Batch {batch_num}] Still no available keys after waiting")
-                return {}
-        
-        key_index = API_KEYS.index(api_key) + 1
-        print(f"    [Batch {batch_num}] Using API key #{key_index}")
-        
-        # Try this key with retries
-        for attempt in range(MAX_RETRIES_PER_KEY):
-            try:
-                print(f"    [Batch {batch_num}] Sending request (key #{key_index}, attempt {attempt + 1}/{MAX_RETRIES_PER_KEY})...")
-                start_time = time.time()
-                
-                response = requests.post(
-                    f"{API_URL}?key={api_key}",
-                    headers={'Content-Type': 'application/json'},
-                    json={"contents": [{"parts": [{"text": prompt}]}]},
-                    timeout=60
-                )
-                
-                elapsed = time.time() - start_time
-                print(f"    [Batch {batch_num}] Response received in {elapsed:.1f}s (status: {response.status_code})")
-                
-                if response.status_code == 429:
-                    wait = (2 ** attempt) * 3  # 3s, 6s
-                    print(f"    [Batch {batch_num}] Rate limited on key #{key_index}! Waiting {wait}s...")
-                    time.sleep(wait)
-                    continue
-                
-                if response.status_code != 200:
-                    print(f"    [Batch {batch_num}] API Error {response.status_code}: {response.text[:200]}")
-                    if response.status_code == 429:
-                        # Mark this key as rate-limited and try next key
-                        mark_key_rate_limited(api_key)
-                        break
-                    return {}
-                
-                result = response.json()
-                if 'candidates' not in result or not result['candidates']:
-                    print(f"    [Batch {batch_num}] No candidates in response")
-                    return {}
-                
-                content = result['candidates'][0]['content']['parts'][0]['text']
-                content = content.replace('```json', '').replace('```', '').strip()
-                
-                parsed = json.loads(content)
-                print(f"    [Batch {batch_num}] ✓ Successfully parsed {len(parsed)} translations using key #{key_index}")
-                return parsed
-                
-            except json.JSONDecodeError as e:
-                print(f"    [Batch {batch_num}] JSON parse error: {e}")
-                print(f"    [Batch {batch_num}] Raw response: {content[:300]}...")
-                return {}
-            except requests.Timeout:
-                print(f"    [Batch {batch_num}] Request timed out after 60s")
-                if attempt < MAX_RETRIES_PER_KEY - 1:
-                    continue
+    failures = 0
+    rate_limits = 0
+    max_rate_limits = MAX_RETRIES_PER_KEY * len(API_KEYS)
+    while failures < MAX_RETRIES_PER_KEY and rate_limits <= max_rate_limits:
+        limiter = KEY_POOL.acquire(tokens)
+        key_index = limiter.index + 1
+        content = ''
+        try:
+            log(f"    {tag} Sending request (key #{key_index}, attempt {failures + rate_limits + 1})...")
+            start_time = time.time()
+            
+            response = post_json(limiter, {"contents": [{"parts": [{"text": prompt}]}]})
+            
+            elapsed = time.time() - start_time
+            log(f"    {tag} Response received in {elapsed:.1f}s (status: {response.status_code})")
+            
+            if rejects_compression(response):
+                # The retry takes a fresh key and quota, like any other request
+                if not compression_rejected.is_set():
+                    compression_rejected.set()
+                    log(f"    {tag} Compressed request rejected (status {response.status_code}), "
+                        f"sending bodies uncompressed from now on")
+                continue
+            
+            if response.status_code == 429:
+                # Only this key pauses; the retry goes to whichever key has quota
+                pause = KEY_POOL.penalize(limiter, parse_retry_delay(response))
+                rate_limits += 1
+                log(f"    {tag} Rate limited on key #{key_index}, pausing it for {pause:.0f}s")
+                continue
+            
+            if response.status_code != 200:
+                log(f"    {tag} API Error {response.status_code}: {response.text[:200]}")
                 return {}
-            except Exception as e:
-                print(f"    [Batch {batch_num}] Request error: {type(e).__name__}: {e}")
-                if attempt < MAX_RETRIES_PER_KEY - 1:
-                    continue
+            
+            result = response.json()
+            KEY_POOL.settle(limiter, tokens, result.get('usageMetadata', {}).get('totalTokenCount'))
+            if 'candidates' not in result or not result['candidates']:
+                log(f"    {tag} No candidates in response")
                 return {}
-        
-        # If we exhausted retries on this key due to rate limiting, mark it and try next
-        if response.status_code == 429:
-            mark_key_rate_limited(api_key)
-            keys_tried += 1
-            print(f"    [Batch {batch_num}] Switching to next API key...")
-            time.sleep(2)  # Brief pause before trying next key
-            continue
-        
-        # If we got here, we failed for non-rate-limit reasons
-        break
+            
+            candidate = result['candidates'][0]
+            if candidate.get('finishReason') == 'MAX_TOKENS':
+                log(f"    {tag} Response truncated at the output token limit")
+                return split_batch(input_data, target_lang, batch_num, total_batches, part)
+            
+            content = candidate['content']['parts'][0]['text']
+            content = content.replace('```json', '').replace('```', '').strip()
+            
+            parsed = json.loads(content)
+            if not isinstance(parsed, dict):
+                log(f"    {tag} Expected a JSON object, got {type(parsed).__name__}")
+                return split_batch(input_data, target_lang, batch_num, total_batches, part)
+            log(f"    {tag} ✓ Successfully parsed {len(parsed)} translations using key #{key_index}")
+            return parsed
+            
+        except json.JSONDecodeError as e:
+            log(f"    {tag} JSON parse error: {e}")
+            log(f"    {tag} Raw response: {content[:300]}...")
+            return split_batch(input_data, target_lang, batch_num, total_batches, part)
+        except requests.Timeout:
+            log(f"    {tag} Request timed out after 60s")
+            failures += 1
+        except Exception as e:
+            log(f"    {tag} Request error: {type(e).__name__}: {e}")
+            failures += 1
     
-    print(f"    [Batch {batch_num}] Failed after trying {keys_tried} API key(s)")
+    log(f"    {tag} Failed after {failures + rate_limits} attempt(s)")
     return {}
 
-def process_language(lang_dir: Path, source_strings: Dict[str, str], lang_num: int = 1, total_langs: int = 1) -> str:
-    """Process a single language, returns status message."""
+def prepare_language(lang_dir: Path, source_strings: Dict[str, str], memory: TranslationMemory,
+                     batch_tokens: int = BATCH_TOKENS) -> Dict:
+    """
+    Work out what a language needs: missing and stale strings, minus those the translation memory has.
+    
+    Translations made before the memory existed are adopted as up to date for
+    their current source text, so later edits to the English text are detected.
+    Keys that get a new translation are only marked as current (job['marks'])
+    once finish_language has written them to the locale file.
+    """
     lang_code = lang_dir.name.replace('values-', '')
     target_file = lang_dir / 'strings.xml'
-    
-    print(f"\n[{lang_num}/{total_langs}] Processing {lang_code}...")
-    print(f"  Target file: {target_file}")
-    
     current_strings = load_strings(target_file)
-    print(f"  Existing translations: {len(current_strings)}")
     
-    # Only get missing strings
-    missing = {k: v for k, v in source_strings.items() if k not in current_strings and v}
+    missing = {}
+    reused = {}
+    marks = {}
+    stale = 0
+    for key, text in source_strings.items():
+        if not text:
+            continue
+        source_hash = memory.source_hash(text)
+        if key in current_strings:
+            translated_from = memory.translated_from(lang_code, key)
+            if translated_from is None:
+                memory.mark(lang_code, key, source_hash)
+                if current_strings[key] and memory.lookup(lang_code, source_hash) is None:
+                    memory.remember(lang_code, source_hash, current_strings[key], 'existing')
+                continue
+            if translated_from == source_hash:
+                continue
+            stale += 1
+        cached = memory.lookup(lang_code, source_hash)
+        if cached is not None:
+            reused[key] = cached
+            marks[key] = source_hash
+        else:
+            missing[key] = text
     
-    if not missing:
-        return f"✓ [{lang_code}] Up to date (0 missing)"
+    # Keys with identical English text ("Cancel", "Retry", ...) are sent once, under the first key
+    shared = {}
+    for key, text in missing.items():
+        shared.setdefault(text, []).append(key)
+    shared = {keys[0]: keys for keys in shared.values()}
     
-    print(f"  Missing translations: {len(missing)}")
+    batches = make_batches({k: missing[k] for k in shared}, batch_tokens)
     
-    keys = list(missing.keys())
-    total_batches = (len(keys) - 1) // BATCH_SIZE + 1
-    new_translations = {}
+    log(f"  {lang_code}: {len(current_strings)} existing, {stale} stale, {len(reused)} from memory, "
+        f"{len(missing)} to translate ({len(shared)} unique) in {len(batches)} batch(es)")
+    return {
+        'lang_code': lang_code,
+        'target_file': target_file,
+        'current': current_strings,
+        'missing': missing,
+        'reused': reused,
+        'shared': shared,
+        'stale': stale,
+        'marks': marks,
+        'batches': batches,
+        'translations': {},
+        'pending': len(batches),
+    }
+
+def run_batch(batch: Dict[str, str], lang_code: str, batch_num: int, total_batches: int,
+              journal: BatchJournal) -> Dict[str, str]:
+    """Translate a batch and journal the result from the worker thread, before anything else can go wrong."""
+    translated = translate_batch(batch, lang_code, batch_num, total_batches)
+    journal.write(lang_code, {TranslationMemory.source_hash(batch[key]): translation
+                              for key, translation in translated.items()
+                              if key in batch and isinstance(translation, str)})
+    return translated
+
+def record_translations(job: Dict, translated: Dict[str, str], memory: TranslationMemory):
+    """Keep a batch's results for the language and in the translation memory, fanning out shared strings."""
+    for key, translation in translated.items():
+        if key not in job['shared'] or not isinstance(translation, str):
+            continue
+        source_hash = memory.source_hash(job['missing'][key])
+        memory.remember(job['lang_code'], source_hash, translation, MODEL_NAME)
+        for shared_key in job['shared'][key]:
+            job['marks'][shared_key] = source_hash
+            job['translations'][shared_key] = translation
+
+def finish_language(job: Dict, memory: TranslationMemory) -> str:
+    """
+    Save a language once all of its batches are done, returns status message.
     
-    for i in range(0, len(keys), BATCH_SIZE):
-        batch_num = i // BATCH_SIZE + 1
-        batch = {k: missing[k] for k in keys[i:i+BATCH_SIZE]}
-        translated = translate_batch(batch, lang_code, batch_num, total_batches)
-        new_translations.update(translated)
-        if i + BATCH_SIZE < len(keys):
-            print(f"    Waiting 2s before next batch...")
-            time.sleep(2)  # Rate limit between batches
+    Only after the locale file is written are its new translations marked as
+    current in the memory; a run that stops earlier leaves them stale.
+    """
+    lang_code, missing, reused, new_translations = job['lang_code'], job['missing'], job['reused'], job['translations']
+    if not missing and not reused:
+        return f"✓ [{lang_code}] Up to date (0 missing)"
     
-    if new_translations:
-        current_strings.update(new_translations)
-        save_strings(target_file, current_strings)
-        print(f"  Saved to {target_file}")
-        return f"✓ [{lang_code}] Added {len(new_translations)}/{len(missing)} strings"
+    if new_translations or reused:
+        job['current'].update(reused)
+        job['current'].update(new_translations)
+        save_strings(job['target_file'], job['current'])
+        log(f"  Saved to {job['target_file']}")
+        for key in list(reused) + list(new_translations):
+            memory.mark(lang_code, key, job['marks'][key])
+        return (f"✓ [{lang_code}] Added {len(new_translations) + len(reused)}/{len(missing) + len(reused)} strings "
+                f"({len(reused)} from memory, {job['stale']} were stale)")
     return f"⚠ [{lang_code}] Translation failed (0/{len(missing)} strings)"
 
+def translate_all(lang_dirs: List[Path], source_strings: Dict[str, str], concurrency: int,
+                  memory: TranslationMemory, journal: BatchJournal, batch_tokens: int = BATCH_TOKENS) -> List[Dict]:
+    """
+    Translate every language, with up to `concurrency` batches (of any languages) in flight.
+    
+    Pacing is left entirely to the per-key quota windows; each language is
+    saved (with the translation memory) as soon as its last batch finishes,
+    and every batch is journaled as it arrives. Returns the language jobs, each
+    with its status message under 'result'.
+    """
+    jobs = [prepare_language(lang_dir, source_strings, memory, batch_tokens) for lang_dir in lang_dirs]
+    for job in jobs:
+        if not job['batches']:
+            job['result'] = finish_language(job, memory)
+            log(job['result'])
+    memory.save()
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        futures = {}
+        for job in jobs:
+            total = len(job['batches'])
+            for batch_num, batch in enumerate(job['batches'], 1):
+                future = executor.submit(run_batch, batch, job['lang_code'], batch_num, total, journal)
+                futures[future] = job
+        
+        for future in as_completed(futures):
+            job = futures[future]
+            record_translations(job, future.result(), memory)
+            job['pending'] -= 1
+            if job['pending'] == 0:
+                job['result'] = finish_language(job, memory)
+                memory.save()
+                log(job['result'])
+    except KeyboardInterrupt:
+        # Batches already sent still finish and are journaled; queued ones are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return jobs
+
 def main():
     setup_io()
+    parser = argparse.ArgumentParser(description="Translate missing strings.xml entries with Gemini")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Batches in flight at once across all languages (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--batch-tokens', type=int, default=BATCH_TOKENS,
+                        help=f"Estimated input tokens per request (default: {BATCH_TOKENS})")
+    parser.add_argument('--resume', action='store_true',
+                        help=f"Continue an interrupted run from its journal ({JOURNAL_FILE})")
+    parser.add_argument('--memory', type=Path, default=TRANSLATION_MEMORY_FILE,
+                        help=f"Translation memory file (default: {TRANSLATION_MEMORY_FILE})")
+    parser.add_argument('--report', type=Path, help="Also write the run's statistics to this JSON file")
+    args = parser.parse_args()
     
     if not API_KEYS:
         print("❌ No API keys configured!")
@@ -292,6 +730,8 @@ def main():
         sys.exit(1)
     
     print(f"✓ Loaded {len(API_KEYS)} API key(s)")
+    for limiter in KEY_POOL.limiters:
+        print(f"  Key #{limiter.index + 1}: {limiter.requests.per_minute:.0f} requests/min, {limiter.tokens.per_minute:.0f} tokens/min")
     
     print(f"Loading source strings...")
     source_strings = load_strings(SOURCE_FILE)
@@ -301,31 +741,67 @@ def main():
                         if d.is_dir() and d.name.startswith('values-')])
     
     print(f"Found {len(lang_dirs)} target languages: {[d.name.replace('values-', '') for d in lang_dirs]}")
+    print(f"Concurrency: {args.concurrency} batch(es) in flight, up to ~{args.batch_tokens} tokens each")
     print("=" * 60)
     
-    # Sequential to avoid rate limits
-    success_count = 0
-    fail_count = 0
-    skip_count = 0
+    memory = TranslationMemory(args.memory)
+    print(f"Translation memory: {sum(len(e) for e in memory.entries.values())} entries in {args.memory}")
     
-    for idx, lang_dir in enumerate(lang_dirs, 1):
-        result = process_language(lang_dir, source_strings, idx, len(lang_dirs))
-        print(result)
-        
-        if "✓" in result and "Up to date" in result:
-            skip_count += 1
-        elif "✓" in result:
-            success_count += 1
-        else:
-            fail_count += 1
-        
-        if idx < len(lang_dirs):
-            print("  Waiting 1s before next language...")
-            time.sleep(1)
+    journal = BatchJournal(JOURNAL_FILE)
+    if args.resume:
+        print(f"Resuming: {journal.replay(memory)} translations replayed from {journal.path}")
+    elif journal.path.exists():
+        print(f"⚠ Discarding the journal of an interrupted run ({journal.path}), use --resume to continue it")
+    journal.open(args.resume)
+    
+    start_time = time.time()
+    try:
+        jobs = translate_all(lang_dirs, source_strings, args.concurrency, memory, journal, args.batch_tokens)
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted, waiting for requests in flight. Run again with --resume to continue")
+        sys.exit(130)
+    journal.finish()
+    elapsed = time.time() - start_time
+    results = [job['result'] for job in jobs]
+    
+    skip_count = sum(1 for result in results if "✓" in result and "Up to date" in result)
+    success_count = sum(1 for result in results if "✓" in result) - skip_count
+    fail_count = len(results) - success_count - skip_count
     
     print("\n" + "=" * 60)
-    print(f"Summary: {success_count} updated, {skip_count} skipped, {fail_count} failed")
-    print(f"API Keys: {len(API_KEYS)} total, {len(rate_limited_keys)} rate-limited")
+    print(f"Summary: {success_count} updated, {skip_count} skipped, {fail_count} failed in {elapsed:.0f}s")
+    print(f"Time waiting for quota: {KEY_POOL.wait_seconds:.0f}s (summed over concurrent batches)")
+    for limiter in KEY_POOL.limiters:
+        print(f"  Key #{limiter.index + 1}: {limiter.sent} requests, ~{limiter.tokens_used} tokens, "
+              f"{limiter.rate_limited} rate-limited")
+    
+    requests_sent = sum(limiter.sent for limiter in KEY_POOL.limiters)
+    connections = sum(limiter.connections_opened() for limiter in KEY_POOL.limiters)
+    body_bytes = sum(limiter.body_bytes for limiter in KEY_POOL.limiters)
+    sent_bytes = sum(limiter.sent_bytes for limiter in KEY_POOL.limiters)
+    print(f"Connections: {connections} opened for {requests_sent} requests "
+          f"({max(0, requests_sent - connections)} reused a kept-alive connection)")
+    print(f"Transfer: {sent_bytes / 1024:.0f} KB sent ({body_bytes / 1024:.0f} KB before gzip), "
+          f"{sum(limiter.received_bytes for limiter in KEY_POOL.limiters) / 1024:.0f} KB received, "
+          f"{sum(limiter.gzip_responses for limiter in KEY_POOL.limiters)} gzipped response(s)")
+    
+    if args.report:
+        report = {
+            'seconds': elapsed,
+            'concurrency': args.concurrency,
+            'batch_tokens': args.batch_tokens,
+            'languages': {'updated': success_count, 'skipped': skip_count, 'failed': fail_count},
+            'strings_translated': sum(len(job['translations']) for job in jobs),
+            'strings_from_memory': sum(len(job['reused']) for job in jobs),
+            'requests': requests_sent,
+            'rate_limited': sum(limiter.rate_limited for limiter in KEY_POOL.limiters),
+            'tokens': sum(limiter.tokens_used for limiter in KEY_POOL.limiters),
+            'quota_wait_seconds': KEY_POOL.wait_seconds,
+            'connections': connections,
+            'bytes_sent': sent_bytes,
+        }
+        args.report.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Report written to {args.report}")
     
     print("\n✨ Done!")
 
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Gemini Translator Benchmark
+Runs the full gemini_translator.py against gemini_mock_server.py over a
+synthetic composeResources tree (30 empty locales by default) and reports
+strings per second, requests made and time spent waiting for quota, so that
+concurrency and batching changes can be measured reproducibly offline.
+
+Every configuration gets a fresh copy of the tree, an empty translation
+memory and a fresh mock server with the same seed. The translator runs as a
+subprocess with the --report option, exactly as it would from the command line.
+
+Usage:
+    python scripts/gemini_translator_bench.py
+    python scripts/gemini_translator_bench.py --concurrency 4,8,16 --batch-tokens 2000,4000
+    python scripts/gemini_translator_bench.py --rpm 30 --malformed-rate 0.05 --output bench.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from gemini_mock_server import MockGemini, start_server
+from gemini_translator import LANG_NAMES, load_strings, save_strings
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+TRANSLATOR = Path(__file__).resolve().parent / 'gemini_translator.py'
+
+LABELS = ["Cancel", "Retry", "Delete", "Save", "Library", "Settings", "Download", "Open", "Close", "Done"]
+WORDS = ("chapter book source library reader novel bookmark download update theme font scroll page "
+         "backup restore category filter history progress cache extension language").split()
+
+
+def synthetic_strings(count: int, seed: int) -> Dict[str, str]:
+    """UI-like strings: mostly short labels and sentences, some long descriptions, shared labels and placeholders."""
+    rng = random.Random(seed)
+    strings = {}
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.05:
+            text = rng.choice(LABELS)
+        elif kind < 0.55:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).capitalize()
+        elif kind < 0.9:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize() + '.'
+        else:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 90))).capitalize() + '.'
+        if rng.random() < 0.1:
+            text += rng.choice([" (%d)", ": %1$s", " %1$s of %2$s"])
+        strings[f"bench_string_{i}"] = text
+    return strings
+
+
+def build_tree(root: Path, source: Dict[str, str], locales: List[str], prefill: float, seed: int):
+    rng = random.Random(seed)
+    save_strings(root / 'values' / 'strings.xml', source)
+    for lang in locales:
+        existing = {k: f"[{LANG_NAMES[lang]}] {v}" for k, v in source.items() if rng.random() < prefill}
+        lang_dir = root / f"values-{lang}"
+        lang_dir.mkdir(parents=True)
+        if existing:
+            save_strings(lang_dir / 'strings.xml', existing)
+
+
+def run_config(template: Path, work_dir: Path, args, concurrency: int, batch_tokens: int) -> Dict:
+    run_dir = work_dir / f"c{concurrency}-b{batch_tokens}"
+    tree = run_dir / 'composeResources'
+    shutil.copytree(template, tree)
+
+    mock = MockGemini(args.latency, args.jitter, args.rpm, args.tpm,
+                      args.rate_limit_rate, args.malformed_rate, args.seed)
+    server = start_server(mock)
+    client_rpm = args.client_rpm or args.rpm or 100000
+    client_tpm = args.client_tpm or args.tpm or 100000000
+    env = dict(os.environ,
+               GEMINI_API_KEY=','.join(f"bench-key-{i + 1}" for i in range(args.keys)),
+               GEMINI_API_URL=f"http://127.0.0.1:{server.server_port}/v1beta/models/gemini-2.5-flash:generateContent",
+               GEMINI_I18N_DIR=str(tree),
+               GEMINI_RPM=str(client_rpm),
+               GEMINI_TPM=str(client_tpm),
+               GEMINI_JOURNAL_FILE=str(run_dir / 'journal.jsonl'),
+               PYTHONIOENCODING='utf-8')
+    env.pop('GEMINI_TM_FILE', None)
+    for name in [name for name in env if name.startswith('GEMINI_API_KEY_')]:
+        del env[name]
+    report_file = run_dir / 'report.json'
+    command = [sys.executable, str(TRANSLATOR), '--concurrency', str(concurrency),
+               '--batch-tokens', str(batch_tokens), '--memory', str(run_dir / 'memory.json'),
+               '--report', str(report_file)]
+
+    start_time = time.perf_counter()
+    with open(run_dir / 'translator.log', 'w', encoding='utf-8') as log_file:
+        process = subprocess.run(command, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    wall_seconds = time.perf_counter() - start_time
+    server.shutdown()
+    server.server_close()
+    if process.returncode != 0 or not report_file.exists():
+        raise RuntimeError(f"Translator failed (exit {process.returncode}), see {run_dir / 'translator.log'}")
+
+    report = json.loads(report_file.read_text(encoding='utf-8'))
+    complete = sum(len(load_strings(tree / f"values-{lang}" / 'strings.xml')) for lang in args.locale_codes)
+    return {
+        'concurrency': concurrency,
+        'batch_tokens': batch_tokens,
+        'seconds': report['seconds'],
+        'wall_seconds': wall_seconds,
+        'strings_translated': report['strings_translated'],
+        'strings_per_second': report['strings_translated'] / max(report['seconds'], 1e-9),
+        'strings_missing': args.expected_strings - complete,
+        'requests': report['requests'],
+        'rate_limited': report['rate_limited'],
+        'quota_wait_seconds': report['quota_wait_seconds'],
+        'connections': report['connections'],
+        'server': mock.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gemini_translator.py against the local mock server")
+    parser.add_argument('--strings', type=int, default=2000, help="Source strings in the synthetic tree")
+    parser.add_argument('--locales', type=int, default=30, help=f"Target locales (max {len(LANG_NAMES)})")
+    parser.add_argument('--prefill', type=float, default=0.0, help="Fraction of each locale already translated")
+    parser.add_argument('--concurrency', default='8,16', help="Comma-separated values to try")
+    parser.add_argument('--batch-tokens', default='4000', help="Comma-separated values to try")
+    parser.add_argument('--keys', type=int, default=4, help="API keys the translator rotates through")
+    parser.add_argument('--latency', type=float, default=0.5, help="Mock seconds per request")
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--rpm', type=float, default=0, help="Mock requests per minute per key (0: unlimited)")
+    parser.add_argument('--tpm', type=float, default=0, help="Mock tokens per minute per key (0: unlimited)")
+    parser.add_argument('--client-rpm', type=float, default=0,
+                        help="GEMINI_RPM given to the translator (default: the mock's quota)")
+    parser.add_argument('--client-tpm', type=float, default=0,
+                        help="GEMINI_TPM given to the translator (default: the mock's quota)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of random 429s")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Fraction of cut-off JSON responses")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--keep', action='store_true', help="Keep the work directory with trees and logs")
+    parser.add_argument('--output', help="Write results JSON here")
+    args = parser.parse_args()
+
+    args.locale_codes = list(LANG_NAMES)[:args.locales]
+    args.expected_strings = args.strings * len(args.locale_codes)
+    configs = list(itertools.product([int(v) for v in args.concurrency.split(',')],
+                                     [int(v) for v in args.batch_tokens.split(',')]))
+
+    work_dir = Path(tempfile.mkdtemp(prefix='gemini-bench-'))
+    template = work_dir / 'template'
+    build_tree(template, synthetic_strings(args.strings, args.seed), args.locale_codes, args.prefill, args.seed)
+    print(f"{args.strings} strings x {len(args.locale_codes)} locales, {args.keys} keys, "
+          f"mock latency {args.latency}s, rpm {args.rpm or 'unlimited'}, "
+          f"429 rate {args.rate_limit_rate}, malformed rate {args.malformed_rate}")
+
+    rows = []
+    try:
+        print(f"{'conc':>5} {'tokens':>7} {'seconds':>8} {'strings/s':>10} {'requests':>9} {'429s':>5} "
+              f"{'malformed':>10} {'wait s':>8} {'conns':>6} {'missing':>8}")
+        for concurrency, batch_tokens in configs:
+            row = run_config(template, work_dir, args, concurrency, batch_tokens)
+            rows.append(row)
+            print(f"{concurrency:>5} {batch_tokens:>7} {row['seconds']:8.1f} {row['strings_per_second']:10.0f} "
+                  f"{row['requests']:>9} {row['rate_limited']:>5} {row['server']['malformed']:>10} "
+                  f"{row['quota_wait_seconds']:8.1f} {row['connections']:>6} {row['strings_missing']:>8}")
+    finally:
+        if args.keep:
+            print(f"\nWork directory kept at {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        settings = {k: v for k, v in vars(args).items() if k not in ('output', 'keep', 'locale_codes')}
+        with open(args.output, 'w') as f:
+            json.dump({'settings': settings, 'runs': rows}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Tests for gemini_translator.py's translation memory and resume bookkeeping.
+
+Run from the repository root:
+    python -m pytest scripts/test_gemini_translator.py
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import gemini_translator as gt
+from gemini_mock_server import MockGemini, parse_prompt, start_server
+from gemini_translator import BatchJournal, KeyPool, QuotaWindow, TranslationMemory, load_strings, save_strings
+
+
+def make_tree(tmp_path, source, locales):
+    save_strings(tmp_path / 'values' / 'strings.xml', source)
+    lang_dirs = []
+    for lang, strings in locales.items():
+        lang_dir = tmp_path / f"values-{lang}"
+        lang_dir.mkdir()
+        if strings:
+            save_strings(lang_dir / 'strings.xml', strings)
+        lang_dirs.append(lang_dir)
+    return lang_dirs
+
+
+class FakeResponse:
+    """Just enough of a requests.Response for translate_batch."""
+
+    def __init__(self, text: str, finish_reason: str = 'STOP'):
+        self.status_code = 200
+        self.headers = {}
+        self.request = self
+        self.text = text
+        self.result = {'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': finish_reason}]}
+
+    def json(self):
+        return self.result
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Route translate_batch to a fake endpoint; returns the list of batches it was sent."""
+    monkeypatch.setattr(gt, 'API_KEYS', ['test-key'])
+    monkeypatch.setattr(gt, 'KEY_POOL', KeyPool(['test-key'], [1e6], [1e9]))
+    batches = []
+
+    def install(respond):
+        def post_json(limiter, payload):
+            language, strings = parse_prompt(payload['contents'][0]['parts'][0]['text'])
+            batches.append(sorted(strings))
+            return respond(language, strings)
+        monkeypatch.setattr(gt, 'post_json', post_json)
+        return batches
+    return install
+
+
+def translated(language, strings):
+    return json.dumps({key: f"[{language}] {text}" for key, text in strings.items()})
+
+
+def test_truncated_response_is_halved(fake_api):
+    batches = fake_api(lambda language, strings: FakeResponse(
+        translated(language, strings), 'MAX_TOKENS' if len(strings) > 2 else 'STOP'))
+    strings = {f"key{i}": f"Text {i}" for i in range(4)}
+    assert gt.translate_batch(strings, 'fr') == {key: f"[French] {text}" for key, text in strings.items()}
+    assert batches == [['key0', 'key1', 'key2', 'key3'], ['key0', 'key1'], ['key2', 'key3']]
+
+
+@pytest.mark.parametrize('bad_response', [
+    lambda text: text[:len(text) // 2],  # Cut-off JSON
+    lambda text: json.dumps(list(json.loads(text).values())),  # Not an object
+])
+def test_only_the_bad_string_is_dropped(fake_api, bad_response):
+    def respond(language, strings):
+        text = translated(language, strings)
+        return FakeResponse(bad_response(text) if 'bad' in strings else text)
+
+    batches = fake_api(respond)
+    strings = {'a': 'One', 'b': 'Two', 'bad': 'Three', 'c': 'Four', 'd': 'Five'}
+    result = gt.translate_batch(strings, 'de')
+    assert result == {key: f"[German] {text}" for key, text in strings.items() if key != 'bad'}
+    assert ['bad'] in batches
+
+
+def test_make_batches_budget():
+    strings = {'a': 'Short', 'b': 'Also short', 'long': 'word ' * 400, 'c': 'Short again'}
+    batches = gt.make_batches(strings, budget=50)
+    assert {'long': strings['long']} in batches
+    assert [key for batch in batches for key in batch] == list(strings)
+    for batch in batches:
+        if len(batch) > 1:
+            assert gt.estimate_tokens(json.dumps(batch)) <= 50
+
+
+@pytest.mark.parametrize('reject_gzip', [0, 415, 400])
+def test_compression_and_connection_reuse(monkeypatch, reject_gzip):
+    mock = MockGemini(latency=0.05, reject_gzip=reject_gzip)
+    server = start_server(mock)
+    monkeypatch.setattr(gt, 'API_URL',
+                        f"http://127.0.0.1:{server.server_port}/v1beta/models/gemini-2.5-flash:generateContent")
+    monkeypatch.setattr(gt, 'API_KEYS', ['test-key'])
+    monkeypatch.setattr(gt, 'POOL_SIZE', 4)
+    monkeypatch.setattr(gt, 'KEY_POOL', KeyPool(['test-key'], [1e6], [1e9]))
+    monkeypatch.setattr(gt, 'compression_rejected', threading.Event())
+
+    batches = [{f"key{b}_{i}": f"Library chapter {i} of batch {b}" for i in range(40)} for b in range(12)]
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda batch: gt.translate_batch(batch, 'fr'), batches))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for batch, result in zip(batches, results):
+        assert result == {key: f"[French] {text}" for key, text in batch.items()}
+    stats = mock.snapshot()
+    if reject_gzip:
+        # Only the requests already in flight went out gzipped; each was retried uncompressed
+        assert gt.compression_rejected.is_set()
+        assert 1 <= stats['gzip_requests'] <= 4
+        assert stats['requests'] == len(batches)
+    else:
+        assert stats['gzip_requests'] == stats['requests'] == len(batches)
+    limiter = gt.KEY_POOL.limiters[0]
+    assert limiter.connections_opened() <= 4 < limiter.sent
+
+
+def test_unsaved_translations_stay_stale(tmp_path):
+    source = {'greeting': 'Hello there'}
+    fr_dir, = make_tree(tmp_path, source, {'fr': {'greeting': 'Ancien'}})
+    memory = TranslationMemory(tmp_path / 'memory.json')
+    memory.mark('fr', 'greeting', memory.source_hash('Hello'))  # Translated from older English text
+
+    job = gt.prepare_language(fr_dir, source, memory)
+    assert job['stale'] == 1
+    gt.record_translations(job, {'greeting': 'Bonjour'}, memory)
+    memory.save()  # Another language finishing; this one never reaches finish_language
+
+    memory = TranslationMemory(tmp_path / 'memory.json')
+    job = gt.prepare_language(fr_dir, source, memory)
+    assert job['stale'] == 1
+    assert job['reused'] == {'greeting': 'Bonjour'}
+    assert load_strings(fr_dir / 'strings.xml') == {'greeting': 'Ancien'}
+
+    gt.finish_language(job, memory)
+    assert load_strings(fr_dir / 'strings.xml') == {'greeting': 'Bonjour'}
+    assert gt.prepare_language(fr_dir, source, memory)['stale'] == 0
+
+
+def test_resume_writes_stale_key_journaled_before_crash(tmp_path, monkeypatch):
+    source = {'greeting': 'Hello there', 'farewell': 'Goodbye'}
+    fr_dir, de_dir = make_tree(tmp_path, source, {'fr': {'greeting': 'Ancien'}, 'de': {}})
+    memory = TranslationMemory(tmp_path / 'memory.json')
+    memory.mark('fr', 'greeting', memory.source_hash('Hello'))
+    memory.save()
+
+    def crash_on_farewell(strings, lang, *args):
+        if lang == 'fr' and 'farewell' in strings:
+            time.sleep(0.5)  # Let German finish and save the memory first
+            raise KeyboardInterrupt
+        return {key: f"[{lang}] {text}" for key, text in strings.items()}
+
+    monkeypatch.setattr(gt, 'translate_batch', crash_on_farewell)
+    journal = BatchJournal(tmp_path / 'journal.jsonl')
+    journal.open(resume=False)
+    with pytest.raises(KeyboardInterrupt):
+        gt.translate_all([fr_dir, de_dir], source, 4, memory, journal, batch_tokens=1)
+    journal.file.close()
+    assert load_strings(de_dir / 'strings.xml') == {'greeting': '[de] Hello there', 'farewell': '[de] Goodbye'}
+    assert load_strings(fr_dir / 'strings.xml') == {'greeting': 'Ancien'}
+
+    def translate_rest(strings, lang, *args):
+        assert 'greeting' not in strings  # Paid for before the crash, comes from the journal
+        return {key: f"[{lang}] {text}" for key, text in strings.items()}
+
+    monkeypatch.setattr(gt, 'translate_batch', translate_rest)
+    memory = TranslationMemory(tmp_path / 'memory.json')
+    journal = BatchJournal(tmp_path / 'journal.jsonl')
+    assert journal.replay(memory) == 3
+    journal.open(resume=True)
+    jobs = gt.translate_all([fr_dir, de_dir], source, 4, memory, journal, batch_tokens=1)
+    journal.finish()
+
+    assert load_strings(fr_dir / 'strings.xml') == {'greeting': '[fr] Hello there', 'farewell': '[fr] Goodbye'}
+    assert [job['stale'] for job in jobs] == [1, 0]
+
+
+def test_quota_window_never_exceeds_rpm():
+    window = QuotaWindow(10)
+    now = 1000.0
+    sent = []
+    while now < 1300:
+        now += window.wait_time(1, now)
+        window.take(1, now)
+        sent.append(now)
+        now += 0.01  # Fake clock: time only moves as far as the requests need
+    assert len(sent) >= 40  # The quota is still fully used over time
+    for start in sent:
+        assert sum(1 for t in sent if start <= t < start + 60) <= 10
+
+
+def test_quota_window_pause():
+    window = QuotaWindow(10)
+    window.pause(30, 1000.0)
+    assert window.wait_time(1, 1000.0) == 30
+    assert window.wait_time(1, 1030.0) == 0